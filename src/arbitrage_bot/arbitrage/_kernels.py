@@ -0,0 +1,125 @@
+"""
+Numeric kernels used by the arbitrage scanner.
+
+The kernels work on the scanner's structure-of-arrays price book: `bids` and
+`asks` are (symbols x exchanges) arrays with -inf (bids) and +inf (asks) for
+missing quotes, so a plain argmax/argmin never picks them. `fees` holds the taker
+fee (in percent) of every cell and `rows` lists the symbols quoted on at least
+two exchanges. When numba is installed (see the `speedups` extra) the
+kernel is compiled to machine code on first use and cached on disk; otherwise an
+equivalent vectorized NumPy implementation is used.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Optional speedup, see the `speedups` extra in pyproject.toml
+    numba = None
+
+# Result of a kernel: (symbol row, ask/buy exchange column, bid/sell exchange column,
+# gross profit %, net profit %, number of opportunities). The row is -1 if none was found.
+KernelResult = Tuple[int, int, int, float, float, int]
+
+# Number of symbols processed per block by the vectorized kernel
+BLOCK_ROWS = 256
+
+
+def _best_opportunity_loop(bids: np.ndarray, asks: np.ndarray, fees: np.ndarray,
+                           rows: np.ndarray, threshold: float) -> KernelResult:
+    """
+    Finds the most profitable cross-exchange opportunity in a single pass over the
+    given rows of the price book. Written as plain loops so numba can compile it.
+    """
+    n_cols = bids.shape[1]
+    best_row = best_ask_col = best_bid_col = -1
+    best_gross = best_net = 0.0
+    found = 0
+    for row in rows:
+        best_bid = -np.inf
+        best_ask = np.inf
+        bid_col = ask_col = -1
+        for col in range(n_cols):
+            # Missing quotes are -inf/+inf and never beat the starting values
+            bid = bids[row, col]
+            if bid > best_bid:
+                best_bid, bid_col = bid, col
+            ask = asks[row, col]
+            if ask < best_ask:
+                best_ask, ask_col = ask, col
+
+        if bid_col < 0 or ask_col < 0 or bid_col == ask_col:
+            continue
+        if best_ask <= 0 or best_bid <= best_ask:
+            continue
+
+        gross = (best_bid - best_ask) / best_ask * 100.0
+        net = gross - fees[row, ask_col] - fees[row, bid_col]
+        if net >= threshold:
+            found += 1
+            if found == 1 or net > best_net:
+                best_row, best_ask_col, best_bid_col = row, ask_col, bid_col
+                best_gross, best_net = gross, net
+    return best_row, best_ask_col, best_bid_col, best_gross, best_net, found
+
+
+def _best_opportunity_numpy(bids: np.ndarray, asks: np.ndarray, fees: np.ndarray,
+                            rows: np.ndarray, threshold: float) -> KernelResult:
+    """
+    Vectorized equivalent of `_best_opportunity_loop` for when numba is not available.
+    The rows are processed in blocks of BLOCK_ROWS so that the gathered rows and the
+    temporaries of each block stay in cache instead of spanning the whole universe.
+    """
+    best_row = best_ask_col = best_bid_col = -1
+    best_gross = best_net = 0.0
+    found = 0
+    for start in range(0, rows.size, BLOCK_ROWS):
+        block = rows[start:start + BLOCK_ROWS]
+        block_bids = bids[block]
+        block_asks = asks[block]
+        bid_idx = block_bids.argmax(axis=1)
+        ask_idx = block_asks.argmin(axis=1)
+        best_bid = np.take_along_axis(block_bids, bid_idx[:, None], axis=1)[:, 0]
+        best_ask = np.take_along_axis(block_asks, ask_idx[:, None], axis=1)[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gross = (best_bid - best_ask) / best_ask * 100.0
+        net = gross - fees[block, ask_idx] - fees[block, bid_idx]
+
+        valid = (bid_idx != ask_idx) & (best_ask > 0) & (best_bid > best_ask) & (net >= threshold)
+        block_found = int(np.count_nonzero(valid))
+        if not block_found:
+            continue
+
+        best = int(np.argmax(np.where(valid, net, -np.inf)))
+        # Strictly greater keeps the first of equally profitable symbols
+        if not found or net[best] > best_net:
+            best_row, best_ask_col, best_bid_col = int(block[best]), int(ask_idx[best]), int(bid_idx[best])
+            best_gross, best_net = float(gross[best]), float(net[best])
+        found += block_found
+    return best_row, best_ask_col, best_bid_col, best_gross, best_net, found
+
+
+def merge_results(results: List[KernelResult]) -> KernelResult:
+    """
+    Combines the results of running a kernel on disjoint shards of rows, given in
+    row order, into the result for all of them.
+    """
+    best = (-1, -1, -1, 0.0, 0.0, 0)
+    found = 0
+    for result in results:
+        found += result[5]
+        # Strictly greater keeps the first of equally profitable symbols
+        if result[0] >= 0 and (best[0] < 0 or result[4] > best[4]):
+            best = result
+    return best[0], best[1], best[2], best[3], best[4], found
+
+
+if numba is not None:
+    # fastmath without the 'ninf' flag: the kernel relies on inf comparisons to
+    # skip missing quotes. nogil lets scan shards run in parallel threads.
+    best_opportunity = numba.njit(
+        cache=True, nogil=True, fastmath={'nnan', 'nsz', 'arcp', 'contract', 'afn', 'reassoc'},
+    )(_best_opportunity_loop)
+else:
+    best_opportunity = _best_opportunity_numpy
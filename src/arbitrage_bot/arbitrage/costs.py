@@ -1,7 +1,11 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Dict
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
-from arbitrage_bot.config.settings import config
+import numpy as np
+from loguru import logger
+
+from arbitrage_bot.config.settings import get_config
 
 if TYPE_CHECKING:
     from arbitrage_bot.exchange.manager import ExchangeManager
@@ -14,18 +18,87 @@ class CostCalculator:
     """
     def __init__(self, exchange_manager: ExchangeManager):
         self.exchange_manager = exchange_manager
+        config = get_config()
         fees_config = config.get("fees", {})
         self.default_fee_pct = fees_config.get('default_taker_fee_pct', 0.1)
+        # How often the account's actual fees are re-fetched, see refresh_fees()
+        self.refresh_interval_s = fees_config.get('refresh_interval_s', 3600)
         # Cache to store fee information for each exchange to avoid repeated lookups
         self.fee_cache: Dict[str, float] = {}
+        # Taker fee (in percent) of every known (exchange, symbol) market, see preload()
+        self._fee_pct_by_pair: Dict[Tuple[str, str], float] = {}
+        # Bumped whenever a cached fee changes value so consumers of get_fee_matrix can
+        # refresh; filling the cache with the fee a lookup already returned does not count
+        self.fee_version = 0
+        # Exchanges are connected before the calculator is created, so their
+        # markets can be read right away
+        self.preload()
+
+    def preload(self):
+        """
+        Reads the taker fee of every market of every connected exchange once, so
+        that per-pair fee lookups are a single dictionary probe.
+        """
+        fees = self._fee_pct_by_pair
+        changed = False
+        for exchange_name, exchange in self.exchange_manager.exchanges.items():
+            trading_fees = (exchange.fees or {}).get('trading', {})
+            # Fallback for exchanges that don't specify per-market fees
+            exchange_fee = (trading_fees['taker'] * 100 if trading_fees.get('taker') is not None
+                            else self.default_fee_pct)
+            for symbol, market in (exchange.markets or {}).items():
+                taker = market.get('taker')
+                # CCXT provides fees as a fraction (e.g., 0.001), so we convert to percent
+                fee = taker * 100 if taker is not None else exchange_fee
+                if fees.get((exchange_name, symbol)) != fee:
+                    fees[(exchange_name, symbol)] = fee
+                    changed = True
+        if changed:
+            self.fee_version += 1
+
+    async def refresh_fees(self):
+        """
+        Fetches the account's taker fees for all markets of every exchange that
+        supports it, in a single fetch_trading_fees() request per exchange. These
+        replace the (possibly stale or generic) fees read from the market data.
+        """
+        capabilities = self.exchange_manager.capabilities
+        exchanges = [
+            (name, exchange) for name, exchange in self.exchange_manager.exchanges.items()
+            # The endpoint is private on most exchanges
+            if name in capabilities and capabilities[name].fetch_trading_fees and exchange.apiKey
+        ]
+        if not exchanges:
+            return
+
+        results = await asyncio.gather(
+            *(exchange.fetch_trading_fees() for _, exchange in exchanges),
+            return_exceptions=True,
+        )
+        updated = 0
+        for (exchange_name, _), fees in zip(exchanges, results):
+            if isinstance(fees, Exception):
+                logger.warning(f"Could not fetch trading fees from {exchange_name}: {fees}")
+                continue
+            for symbol, fee in fees.items():
+                if isinstance(fee, dict) and fee.get('taker') is not None:
+                    fee_pct = fee['taker'] * 100
+                    if self._fee_pct_by_pair.get((exchange_name, symbol)) != fee_pct:
+                        self._fee_pct_by_pair[(exchange_name, symbol)] = fee_pct
+                        updated += 1
+
+        if updated:
+            self.fee_version += 1
+            logger.info(f"Updated {updated} trading fees from {len(exchanges)} exchanges")
 
     def get_trading_fee_pct(self, exchange_name: str, symbol: str) -> float:
         """
         Gets the trading fee for a given exchange.
         
         For simplicity, we assume 'taker' fees as arbitrage orders are often
-        market orders to ensure immediate execution. We also assume the fee
-        is the same for all symbols on an exchange.
+        market orders to ensure immediate execution. Markets read by preload()
+        use their own fee; for anything else we assume the fee is the same for
+        all symbols on an exchange.
         
         Args:
             exchange_name: The name of the exchange.
@@ -34,6 +107,10 @@ class CostCalculator:
         Returns:
             The taker fee as a percentage (e.g., 0.1 for 0.1%).
         """
+        fee = self._fee_pct_by_pair.get((exchange_name, symbol))
+        if fee is not None:
+            return fee
+
         if exchange_name in self.fee_cache:
             return self.fee_cache[exchange_name]
 
@@ -52,8 +129,29 @@ class CostCalculator:
             fee = exchange.fees['trading']['taker'] * 100 if 'trading' in exchange.fees else self.default_fee_pct
         
         self.fee_cache[exchange_name] = fee
+        # Until now, lookups for this exchange either filled the cache themselves or,
+        # while the exchange was unavailable, returned the default fee
+        if fee != self.default_fee_pct:
+            self.fee_version += 1
         return fee
 
+    def get_fee_matrix(self, symbols: List[str], exchange_names: List[str],
+                       dtype=np.float64) -> np.ndarray:
+        """
+        Returns the taker fees (in percent) as a (symbols x exchanges) array, in
+        the order of the given lists.
+
+        Args:
+            symbols: The symbols, in the order used to index the rows.
+            exchange_names: The exchanges, in the order used to index the columns.
+            dtype: The dtype of the returned array.
+        """
+        fees = np.empty((len(symbols), len(exchange_names)), dtype=dtype)
+        for row, symbol in enumerate(symbols):
+            for col, exchange_name in enumerate(exchange_names):
+                fees[row, col] = self.get_trading_fee_pct(exchange_name, symbol)
+        return fees
+
     def calculate_net_profit_pct(self, gross_profit_pct: float, buy_exchange: str, sell_exchange: str, symbol: str) -> float:
         """
         Calculates the net profit after deducting trading fees from both exchanges.
@@ -1,21 +1,26 @@
 from __future__ import annotations
-import itertools
-import time
-from collections import defaultdict
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, List, Optional, Dict, Tuple
-import heapq
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, List, Optional, Dict, Tuple
 
+import numpy as np
 from loguru import logger
 
-from arbitrage_bot.config.settings import config
+from arbitrage_bot.config.settings import get_config
 from arbitrage_bot.arbitrage.costs import CostCalculator
+from arbitrage_bot.arbitrage._kernels import BLOCK_ROWS, KernelResult, best_opportunity, merge_results
 from arbitrage_bot.model import Opportunity
+from arbitrage_bot.logging.setup import is_level_enabled
 
 if TYPE_CHECKING:
     from arbitrage_bot.data.fetcher import DataFetcher
     from arbitrage_bot.exchange.manager import ExchangeManager
 
+# float32 keeps ~7 significant digits (relative error ~1e-7), plenty to rank spreads
+# and halving the memory the kernel streams through. The winning opportunity is
+# re-evaluated at float64 from the live quotes.
+PRICE_DTYPE = np.float32
+
 class ArbitrageScanner:
     """
     Scans for arbitrage opportunities across multiple exchanges
@@ -23,169 +28,258 @@ class ArbitrageScanner:
     """
     def __init__(self, data_fetcher: DataFetcher, exchange_manager: ExchangeManager):
         self.data_fetcher = data_fetcher
-        arbitrage_config = config.get("arbitrage", {})
-        self.min_profit_threshold = arbitrage_config.get('min_profit_threshold', 0.1)
+        arbitrage_params = get_config().arbitrage_params
+        self.min_profit_threshold = float(arbitrage_params.min_profit_threshold)
         # Initialize the cost calculator
         self.cost_calculator = CostCalculator(exchange_manager)
-        # Cache for processed prices to avoid repeated calculations
-        self._price_cache: Dict[str, Dict[str, Tuple[float, float]]] = {}  # symbol -> exchange -> (bid, ask)
-        self._last_update_time: Dict[str, float] = {}  # symbol -> timestamp
+        # Threads used by scan_async() to evaluate large symbol universes in shards
+        self._scan_workers = max(1, int(arbitrage_params.scan_workers))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self._scan_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self._scan_workers,
+                                                thread_name_prefix="scan")
+
+        # Structure-of-arrays price book: one row per symbol, one column per exchange.
+        # Missing bids are stored as -inf and missing asks as +inf, so argmax/argmin
+        # skip them without NaN handling. The lookup tables map names to indices.
+        # The matrices persist across scans and only cells reported dirty by the
+        # data fetcher are rewritten. Prices are stored as float32, see PRICE_DTYPE.
+        self._symbol_idx: Dict[str, int] = {}
+        self._exch_idx: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._exchanges: List[str] = []
+        self._bids = np.full((0, 0), -np.inf, dtype=PRICE_DTYPE)
+        self._asks = np.full((0, 0), np.inf, dtype=PRICE_DTYPE)
+        # Per symbol, a bitset of the exchanges currently quoting it (bit = column),
+        # and whether that is at least two: only those symbols can be arbitraged
+        self._venue_masks: List[int] = []
+        self._multi_venue = np.zeros(0, dtype=bool)
+        # Indices of the multi-venue symbols, handed to the kernel on every scan. Only
+        # rebuilt when a symbol gains or loses its second exchange.
+        self._rows = np.zeros(0, dtype=np.intp)
+        self._rows_stale = False
+        # Taker fee (in percent) of every symbol on every exchange, aligned with the
+        # price matrices
+        self._fees = np.zeros((0, 0), dtype=PRICE_DTYPE)
+        self._fee_version = -1
+        # (row, column) of every data fetcher stream, indexed by stream id
+        self._stream_cells: List[Tuple[int, int]] = []
+        self._map_new_streams()
+        self._refresh_fees()
+
+    def _map_new_streams(self):
+        """Assigns matrix cells to the data fetcher streams not seen before."""
+        streams = self.data_fetcher.streams
+        for exchange_name, symbol in streams[len(self._stream_cells):]:
+            self._stream_cells.append(self._slot(exchange_name, symbol))
 
-    def scan(self) -> Optional[Opportunity]:
+    def _refresh_fees(self):
+        """Rebuilds the fee matrix from the cost calculator."""
+        self._fees = self.cost_calculator.get_fee_matrix(self._symbols, self._exchanges, PRICE_DTYPE)
+        self._fee_version = self.cost_calculator.fee_version
+
+    def _slot(self, exchange_name: str, symbol: str) -> Tuple[int, int]:
         """
-        Scans all available order books and identifies potential arbitrage opportunities.
-        Uses optimized algorithm with caching and efficient data structures.
+        Returns the (row, column) of a symbol/exchange pair in the price matrices,
+        growing the matrices the first time a new symbol or exchange is seen.
         """
-        current_time = time.time()
-        
-        # Get all order books
-        all_order_books = self.data_fetcher.get_all_order_books()
-        if not all_order_books:
-            logger.warning("[Scan] No order book data available to scan.")
-            return None
+        row = self._symbol_idx.get(symbol)
+        col = self._exch_idx.get(exchange_name)
+        if row is not None and col is not None:
+            return row, col
 
-        # Build optimized price data structure: symbol -> [(bid_price, bid_exchange), (ask_price, ask_exchange)]
-        symbol_prices = defaultdict(lambda: {'bids': [], 'asks': []})
-        
-        for exchange_name, symbols in all_order_books.items():
-            for symbol, order_book in symbols.items():
-                if not (order_book and order_book.get('bids') and order_book.get('asks')):
-                    continue
-                
-                # Extract best bid and ask
-                best_bid = order_book['bids'][0][0] if order_book['bids'] else None
-                best_ask = order_book['asks'][0][0] if order_book['asks'] else None
-                
-                if best_bid is not None:
-                    symbol_prices[symbol]['bids'].append((best_bid, exchange_name))
-                if best_ask is not None:
-                    symbol_prices[symbol]['asks'].append((best_ask, exchange_name))
-
-        # Find best opportunities using heaps for efficiency
-        best_opportunity = None
-        best_net_profit = -float('inf')
-        
-        # Statistics for debugging
-        scan_stats = {
-            'total_symbols': len(symbol_prices),
-            'no_data': 0,
-            'insufficient_exchanges': 0,
-            'same_exchange': 0,
-            'negative_spreads': 0,
-            'positive_spreads': 0,
-            'opportunities_found': 0
-        }
-        
-        for symbol, prices in symbol_prices.items():
-            if len(prices['bids']) == 0 or len(prices['asks']) == 0:
-                scan_stats['no_data'] += 1
-                logger.debug(f"[No Data] {symbol}: Missing bids({len(prices['bids'])}) or asks({len(prices['asks'])})")
-                continue
-                
-            # Check if we have at least 2 different exchanges
-            all_exchanges = set([ex for _, ex in prices['bids']] + [ex for _, ex in prices['asks']])
-            if len(all_exchanges) < 2:
-                scan_stats['insufficient_exchanges'] += 1
-                logger.debug(f"[Insufficient Exchanges] {symbol}: Only {len(all_exchanges)} exchange(s) available: {list(all_exchanges)}")
-                continue
-            
-            # Use max-heap for bids (highest price) and min-heap for asks (lowest price)
-            # For max-heap, we negate the values
-            max_bid_price, max_bid_exchange = max(prices['bids'])
-            min_ask_price, min_ask_exchange = min(prices['asks'])
-            
-            # Calculate price spread for debugging (always show this)
-            spread_pct = ((max_bid_price - min_ask_price) / min_ask_price) * 100 if min_ask_price > 0 else 0
-            
-            # Always log price spreads for debugging, even negative ones
-            logger.debug(f"[Price Spread] {symbol}: Best Bid {max_bid_exchange}@{max_bid_price:.6f}, "
-                        f"Best Ask {min_ask_exchange}@{min_ask_price:.6f}, "
-                        f"Spread: {spread_pct:+.4f}%")
-            
-            # Skip if same exchange
-            if max_bid_exchange == min_ask_exchange:
-                scan_stats['same_exchange'] += 1
-                logger.debug(f"[Skip] {symbol}: Same exchange ({max_bid_exchange}) for bid and ask")
-                continue
-            
-            # Count spread types
-            if spread_pct >= 0:
-                scan_stats['positive_spreads'] += 1
-            else:
-                scan_stats['negative_spreads'] += 1
-            
-            # Check arbitrage condition
-            if max_bid_price > min_ask_price:
-                gross_profit_pct = spread_pct  # Same calculation as above
-                
-                # Calculate net profit with caching
-                net_profit_pct = self._calculate_net_profit_cached(
-                    gross_profit_pct,
-                    min_ask_exchange,
-                    max_bid_exchange, 
-                    symbol
-                )
-                
-                logger.info(f"[Opportunity Found] {symbol}: Buy on {min_ask_exchange}@{min_ask_price:.6f}, "
-                           f"Sell on {max_bid_exchange}@{max_bid_price:.6f}. "
-                           f"Gross: {gross_profit_pct:.4f}%, Net: {net_profit_pct:.4f}%")
-                
-                # Track the best opportunity
-                if net_profit_pct >= self.min_profit_threshold and net_profit_pct > best_net_profit:
-                    scan_stats['opportunities_found'] += 1
-                    best_net_profit = net_profit_pct
-                    best_opportunity = Opportunity(
-                        symbol=symbol,
-                        buy_exchange=min_ask_exchange,
-                        sell_exchange=max_bid_exchange,
-                        buy_price=min_ask_price,
-                        sell_price=max_bid_price,
-                        gross_profit_pct=gross_profit_pct,
-                        net_profit_pct=net_profit_pct,
-                    )
-        
-        # Log scan statistics
-        if scan_stats['total_symbols'] > 0:
-            logger.debug(f"[Scan Stats] Total: {scan_stats['total_symbols']}, "
-                        f"No Data: {scan_stats['no_data']}, "
-                        f"Insufficient Exchanges: {scan_stats['insufficient_exchanges']}, "
-                        f"Same Exchange: {scan_stats['same_exchange']}, "
-                        f"Positive Spreads: {scan_stats['positive_spreads']}, "
-                        f"Negative Spreads: {scan_stats['negative_spreads']}, "
-                        f"Opportunities: {scan_stats['opportunities_found']}")
-        else:
-            logger.warning("[Scan] No market data available for scanning")
-        
-        return best_opportunity
+        if row is None:
+            row = self._symbol_idx[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            self._venue_masks.append(0)
+        if col is None:
+            col = self._exch_idx[exchange_name] = len(self._exchanges)
+            self._exchanges.append(exchange_name)
+
+        shape = (len(self._symbols), len(self._exchanges))
+        if shape != self._bids.shape:
+            old_rows, old_cols = self._bids.shape
+            bids = np.full(shape, -np.inf, dtype=PRICE_DTYPE)
+            asks = np.full(shape, np.inf, dtype=PRICE_DTYPE)
+            bids[:old_rows, :old_cols] = self._bids
+            asks[:old_rows, :old_cols] = self._asks
+            self._bids, self._asks = bids, asks
+            multi_venue = np.zeros(shape[0], dtype=bool)
+            multi_venue[:old_rows] = self._multi_venue
+            self._multi_venue = multi_venue
+        return row, col
 
-    def _calculate_net_profit_cached(self, gross_profit_pct: float, buy_exchange: str, 
-                                   sell_exchange: str, symbol: str) -> float:
+    def scan(self, dirty: Optional[Iterable[int]] = None) -> Optional[Opportunity]:
         """
-        Calculate net profit with caching to avoid repeated fee lookups.
+        Scans all available order books and identifies potential arbitrage opportunities.
+        Only the (exchange, symbol) books that changed since the previous scan are
+        written into the price matrices, and only the symbols they belong to are
+        evaluated: the others cannot have a new opportunity. The best opportunity is
+        found by a compiled (or vectorized) kernel and only its indices reach Python.
+
+        Args:
+            dirty: The ids of the data fetcher streams that changed. If None, they
+                are taken from the data fetcher.
         """
-        cache_key = f"{buy_exchange}_{sell_exchange}_{symbol}"
-        
-        # For now, we'll use the cost calculator directly since fee caching is already implemented there
-        # In a future optimization, we could add our own caching layer here
-        return self.cost_calculator.calculate_net_profit_pct(
-            gross_profit_pct, buy_exchange, sell_exchange, symbol
+        rows = self._prepare_scan(dirty)
+        if rows is None:
+            return None
+        result = best_opportunity(
+            self._bids, self._asks, self._fees, rows, self.min_profit_threshold
         )
+        return self._finish_scan(result)
 
-    def _get_best_prices_for_symbol(self, symbol_order_books: dict) -> dict:
+    async def scan_async(self, dirty: Optional[Iterable[int]] = None) -> Optional[Opportunity]:
         """
-        Retrieves the best bid and ask for a given symbol from pre-fetched order books.
-        
-        Args:
-            symbol_order_books: A dictionary where keys are exchange names and values are order book data.
-            
+        Same as scan(), but with more than one `scan_workers` configured, a large
+        symbol universe is split into shards evaluated concurrently by the kernel on
+        a thread pool (the kernels release the GIL), keeping the event loop free to
+        process WebSocket messages meanwhile.
+        """
+        rows = self._prepare_scan(dirty)
+        if rows is None:
+            return None
+
+        if self._executor is None or rows.size < self._scan_workers * BLOCK_ROWS:
+            result = best_opportunity(
+                self._bids, self._asks, self._fees, rows, self.min_profit_threshold
+            )
+        else:
+            # The matrices are only written by _prepare_scan, on the event loop, and
+            # the data fetcher never starts another scan before this one completes
+            loop = asyncio.get_running_loop()
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, best_opportunity, self._bids,
+                                     self._asks, self._fees, shard, self.min_profit_threshold)
+                for shard in np.array_split(rows, self._scan_workers)
+            ))
+            result = merge_results(results)
+        return self._finish_scan(result)
+
+    def close(self):
+        """Releases the scan worker threads, if any."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _prepare_scan(self, dirty: Optional[Iterable[int]]) -> Optional[np.ndarray]:
+        """
+        Brings the price matrices, fee matrix and multi-venue rows up to date with
+        the data fetcher.
+
         Returns:
-            A dictionary with 'bids' and 'asks'.
+            The sorted rows to evaluate: the multi-venue symbols that changed, or all
+            of them after a fee change. None if there is nothing to scan.
         """
-        bids = {}
-        asks = {}
-        for exchange_name, order_book in symbol_order_books.items():
-            if order_book.get('bids'):
-                bids[exchange_name] = order_book['bids'][0][0]  # [price, amount]
-            if order_book.get('asks'):
-                asks[exchange_name] = order_book['asks'][0][0]
-        return {'bids': bids, 'asks': asks} 
\ No newline at end of file
+        if not self.data_fetcher.get_all_order_books():
+            logger.warning("[Scan] No order book data available to scan.")
+            return None
+
+        # Copy the Level 1 quote of every book that changed since the last scan.
+        # Attributes used per book are bound to locals once per scan.
+        quotes = self.data_fetcher.quotes
+        stream_cells = self._stream_cells
+        venue_masks = self._venue_masks
+        bids, asks, multi_venue = self._bids, self._asks, self._multi_venue
+        if dirty is None:
+            dirty = self.data_fetcher.pop_dirty()
+        touched: List[int] = []
+        for stream_id in dirty:
+            if stream_id >= len(stream_cells):
+                self._map_new_streams()
+                # A new symbol or exchange may have grown the matrices
+                bids, asks, multi_venue = self._bids, self._asks, self._multi_venue
+            row, col = stream_cells[stream_id]
+            touched.append(row)
+            quote = quotes[stream_id]
+            bids[row, col] = quote.bid
+            asks[row, col] = quote.ask
+            if quote.ask != np.inf:
+                mask = venue_masks[row] | (1 << col)
+            else:
+                mask = venue_masks[row] & ~(1 << col)
+            venue_masks[row] = mask
+            is_multi_venue = mask.bit_count() >= 2
+            if is_multi_venue != multi_venue[row]:
+                multi_venue[row] = is_multi_venue
+                self._rows_stale = True
+
+        if not self._bids.size:
+            logger.warning("[Scan] No market data available for scanning")
+            return None
+
+        if self._rows_stale:
+            self._rows = np.flatnonzero(self._multi_venue)
+            self._rows_stale = False
+
+        if (self._fee_version != self.cost_calculator.fee_version
+                or self._fees.shape != self._bids.shape):
+            # New fees can change the net profit of every symbol
+            self._refresh_fees()
+            return self._rows
+
+        rows = np.unique(np.fromiter(touched, dtype=np.intp, count=len(touched)))
+        return rows[multi_venue[rows]]
+
+    def _finish_scan(self, result: KernelResult) -> Optional[Opportunity]:
+        """Turns the kernel's result into an Opportunity and logs the scan."""
+        row, ask_col, bid_col, _, _, opportunities_found = result
+
+        # Track the best opportunity, with exact prices and profit for the winner
+        opportunity = None
+        if row >= 0:
+            symbol = self._symbols[row]
+            buy_exchange, sell_exchange = self._exchanges[ask_col], self._exchanges[bid_col]
+            buy_price = self.data_fetcher.get_quote(buy_exchange, symbol).ask
+            sell_price = self.data_fetcher.get_quote(sell_exchange, symbol).bid
+            gross = (sell_price - buy_price) / buy_price * 100.0
+            net = self.cost_calculator.calculate_net_profit_pct(gross, buy_exchange, sell_exchange, symbol)
+            # A float32 near-miss can fall just below the threshold at full precision
+            if net >= self.min_profit_threshold:
+                opportunity = Opportunity(
+                    symbol, buy_exchange, sell_exchange, buy_price, sell_price, gross, net,
+                )
+                logger.info("[Opportunity Found] {}: Buy on {}@{:.6f}, Sell on {}@{:.6f}. "
+                            "Gross: {:.4f}%, Net: {:.4f}% ({} opportunities this scan)",
+                            symbol, buy_exchange, buy_price, sell_exchange, sell_price,
+                            gross, net, opportunities_found)
+
+        if is_level_enabled("DEBUG"):
+            # Per-symbol diagnostics are only built when DEBUG records are kept
+            self._log_scan_details(opportunities_found)
+
+        return opportunity
+
+    def _log_scan_details(self, opportunities_found: int):
+        """Logs the per-symbol spreads and the statistics of a scan at DEBUG level."""
+        bids, asks = self._bids, self._asks
+        symbols_seen = sum(1 for mask in self._venue_masks if mask)
+        if not symbols_seen:
+            logger.warning("[Scan] No market data available for scanning")
+            return
+
+        rows = self._rows
+        row_bids = bids[rows]
+        row_asks = asks[rows]
+        bid_idx = row_bids.argmax(axis=1)
+        ask_idx = row_asks.argmin(axis=1)
+        positions = np.arange(rows.size)
+        best_bid = row_bids[positions, bid_idx]
+        best_ask = row_asks[positions, ask_idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = np.where(best_ask > 0, (best_bid - best_ask) / best_ask * 100.0, 0.0)
+        same_exchange = bid_idx == ask_idx
+
+        for k, row in enumerate(rows.tolist()):
+            logger.debug("[Price Spread] {}: Best Bid {}@{:.6f}, Best Ask {}@{:.6f}, Spread: {:+.4f}%",
+                         self._symbols[row], self._exchanges[bid_idx[k]], best_bid[k],
+                         self._exchanges[ask_idx[k]], best_ask[k], spread[k])
+
+        cross_exchange = ~same_exchange
+        logger.debug("[Scan Stats] Total: {}, Insufficient Exchanges: {}, Same Exchange: {}, "
+                     "Positive Spreads: {}, Negative Spreads: {}, Opportunities: {}",
+                     symbols_seen, symbols_seen - rows.size,
+                     int(np.count_nonzero(same_exchange)),
+                     int(np.count_nonzero(cross_exchange & (spread >= 0))),
+                     int(np.count_nonzero(cross_exchange & (spread < 0))),
+                     opportunities_found)
@@ -1,16 +1,18 @@
 import asyncio
 import time
 from loguru import logger
-from typing import Optional, Self
+from typing import Awaitable, Optional, Self, Tuple
 
-from arbitrage_bot.config.settings import config
+from arbitrage_bot.config.settings import load_config
 from arbitrage_bot.exchange.manager import ExchangeManager
 from arbitrage_bot.data.fetcher import DataFetcher
 from arbitrage_bot.arbitrage.scanner import ArbitrageScanner
 from arbitrage_bot.execution.executor import TradeExecutor
 from arbitrage_bot.execution.order_manager import OrderManager
 from arbitrage_bot.risk_management.manager import RiskManager
+from arbitrage_bot.model import Opportunity
 from arbitrage_bot.utils.error_handler import ErrorHandler
+from arbitrage_bot.logging.setup import is_level_enabled
 
 class ArbitrageBot:
     """
@@ -32,11 +34,20 @@ class ArbitrageBot:
         self.paper_mode = paper_mode
         self.running = False
         self._main_task: Optional[asyncio.Task] = None
+        self._fee_refresh_task: Optional[asyncio.Task] = None
+        self._watchdog_task: Optional[asyncio.Task] = None
+        # Detected opportunities are logged by a background task, off the trade path
+        self._opportunity_log: asyncio.Queue[Tuple[int, Opportunity]] = asyncio.Queue()
+        self._opportunity_log_task: Optional[asyncio.Task] = None
+        # Set to end run(), either by shutdown() or by the emergency stop watchdog
+        self._stop_event = asyncio.Event()
+        self._emergency_stop_triggered = False
+        self._shut_down = False
         
         # Performance tracking
         self._scan_count = 0
         self._opportunity_count = 0
-        self._start_time = None
+        self._start_ns = 0  # time.monotonic_ns() when run() started
 
     @classmethod
     async def create(cls, paper_mode: bool = False) -> Self:
@@ -46,11 +57,11 @@ class ArbitrageBot:
         """
         bot = cls(paper_mode)
         
-        bot.config = config
+        bot.config = await load_config()
         bot.error_handler = ErrorHandler()
         
         # Initialize and connect exchanges BEFORE creating dependent components
-        bot.exchange_manager = ExchangeManager(bot.config, bot.error_handler)
+        bot.exchange_manager = ExchangeManager.instance(bot.config, bot.error_handler)
         await bot.exchange_manager.initialize_exchanges()
 
         # Now, create components with a fully initialized exchange_manager
@@ -59,6 +70,9 @@ class ArbitrageBot:
         bot.data_fetcher = DataFetcher(bot.exchange_manager, bot.error_handler)
         bot.arbitrage_scanner = ArbitrageScanner(bot.data_fetcher, bot.exchange_manager)
         bot.trade_executor = TradeExecutor(bot.exchange_manager, bot.order_manager, paper_mode=paper_mode)
+
+        # Replace the market-data fees with the account's actual fees where possible
+        await bot.arbitrage_scanner.cost_calculator.refresh_fees()
         
         return bot
 
@@ -71,7 +85,7 @@ class ArbitrageBot:
             return
 
         self.running = True
-        self._start_time = time.time()
+        self._start_ns = time.monotonic_ns()
         logger.info("=" * 50)
         logger.info("--- PAPER TRADING MODE ---" if self.paper_mode else "--- LIVE TRADING MODE ---")
         if not self.paper_mode:
@@ -83,97 +97,155 @@ class ArbitrageBot:
         logger.info(f"Emergency stop loss: ${self.risk_manager.emergency_stop_loss_usd}")
         logger.info(f"Max open trades: {self.risk_manager.max_open_trades}")
         
-        # Log monitored trading pairs
-        total_pairs = 0
-        for exchange_name, symbols in self.data_fetcher.active_symbols.items():
-            logger.info(f"{exchange_name}: {len(symbols)} pairs - {', '.join(symbols)}")
-            total_pairs += len(symbols)
-        
+        # Log monitored trading pairs as a single record
+        active_symbols = self.data_fetcher.active_symbols
+        total_pairs = len(self.data_fetcher.streams)
+        summary = "\n".join(f"  {exchange_name}: {len(symbols)} pairs - {', '.join(symbols)}"
+                            for exchange_name, symbols in active_symbols.items())
+        logger.info("Monitored pairs:\n{}", summary)
+
         logger.info(f"Total monitoring: {total_pairs} trading pairs across {len(self.exchange_manager.exchanges)} exchanges")
         logger.info("=" * 50)
 
-        # Register event-driven scan callback
-        self.data_fetcher.register_scan_callback(self._on_market_data_change)
-        
         self.data_fetcher.start_monitoring()
+        self._fee_refresh_task = asyncio.create_task(self._refresh_fees_periodically())
+        self._opportunity_log_task = asyncio.create_task(self._log_opportunities())
         
-        logger.info("Waiting 10s for initial market data to populate...")
-        await asyncio.sleep(10)
+        warmup_timeout = self.config.arbitrage_params.warmup_timeout_s
+        logger.info(f"Waiting up to {warmup_timeout}s for initial market data to populate...")
+        not_ready = await self.data_fetcher.wait_ready(timeout=warmup_timeout)
+        if not_ready:
+            logger.warning(f"No market data yet for {len(not_ready)} streams, they will be scanned "
+                           f"once they quote: {', '.join(f'{s}@{e}' for e, s in not_ready)}")
+        else:
+            logger.info("Initial market data received for all streams.")
+
+        # Register event-driven scan callback only now, so scans start on populated books
+        self.data_fetcher.register_scan_callback(self._on_market_data_change)
 
         logger.info("Starting event-driven arbitrage monitoring...")
         logger.info("Scanner will now trigger automatically on Level 1 price changes")
         
-        # Keep the bot running and handle emergency stops
-        loop_count = 0
+        # Scans are driven by the data fetcher; the main task only waits for a stop
+        self._watchdog_task = asyncio.create_task(self._emergency_stop_watchdog())
+        try:
+            await self._stop_event.wait()
+        except asyncio.CancelledError:
+            logger.info("Main loop received cancellation signal.")
+
+        if self._emergency_stop_triggered:
+            await self.shutdown()
+
+        logger.info("Bot run loop finished.")
+
+    async def _emergency_stop_watchdog(self):
+        """
+        Checks the emergency stop condition on a fixed interval and logs the bot's
+        status every 10 checks. In live mode, the open orders are refreshed first,
+        so filled and cancelled orders stop counting against max_open_trades. On an emergency stop, all positions are liquidated
+        and the main task is told to shut down.
+        """
+        interval = self.config.risk_params.emergency_check_interval_s
+        check_count = 0
         while self.running:
             try:
-                loop_count += 1
-                
-                # --- Emergency Stop Check (every 30 seconds) ---
+                check_count += 1
+
+                if not self.paper_mode:
+                    await self.order_manager.refresh_open_orders()
+
                 if self.risk_manager.check_emergency_stop():
                     logger.critical("EMERGENCY STOP CONDITION MET. INITIATING SHUTDOWN.")
                     await self.trade_executor.liquidate_all_positions()
-                    await self.shutdown()
-                    break # Exit the main loop
+                    self._emergency_stop_triggered = True
+                    self._stop_event.set()
+                    return
 
-                # Log periodic status every few loops
-                if loop_count % 10 == 1:  # Every 5 minutes (30s * 10)
+                # Log periodic status every few checks
+                if check_count % 10 == 1:  # Every 5 minutes with the default 30s interval
                     current_pnl = self.risk_manager.pnl
                     open_orders = self.order_manager.get_open_order_count()
-                    uptime = time.time() - self._start_time if self._start_time else 0
-                    scan_rate = self._scan_count / (uptime / 60) if uptime > 0 else 0  # scans per minute
+                    uptime_s = (time.monotonic_ns() - self._start_ns) / 1e9 if self._start_ns else 0
+                    scan_rate = self._scan_count * 60 / uptime_s if uptime_s > 0 else 0  # scans per minute
                     
                     logger.info(f"[STATUS] Bot running normally - "
-                               f"Uptime: {uptime/60:.1f}min, "
+                               f"Uptime: {uptime_s/60:.1f}min, "
                                f"Scans: {self._scan_count} ({scan_rate:.1f}/min), "
                                f"Opportunities: {self._opportunity_count}, "
                                f"PnL: ${current_pnl:.2f}, "
                                f"Open orders: {open_orders}, "
                                f"Paper mode: {self.paper_mode}")
 
-                # Sleep longer since scanning is now event-driven
-                await asyncio.sleep(30)  # Check emergency stop every 30 seconds
+                await asyncio.sleep(interval)
 
             except asyncio.CancelledError:
-                logger.info("Main loop received cancellation signal.")
                 break
             except Exception as e:
-                logger.error(f"An error occurred in the main loop: {e}")
+                logger.error(f"An error occurred in the emergency stop watchdog: {e}")
                 logger.exception(e)
                 await asyncio.sleep(10)
 
-        logger.info("Bot run loop finished.")
+    async def _refresh_fees_periodically(self):
+        """
+        Re-fetches the trading fees on a coarse timer, as they only change with
+        the account's trading volume tier.
+        """
+        cost_calculator = self.arbitrage_scanner.cost_calculator
+        while self.running:
+            await asyncio.sleep(cost_calculator.refresh_interval_s)
+            try:
+                await cost_calculator.refresh_fees()
+            except Exception as e:
+                logger.error(f"Error refreshing trading fees: {e}")
+
+    async def _log_opportunities(self):
+        """
+        Logs the opportunities queued by the scan callback, so that formatting and
+        writing the log lines never delay the risk check and order submission.
+        """
+        while True:
+            number, opportunity = await self._opportunity_log.get()
+            logger.success(
+                "OPPORTUNITY #{}: Net Profit {:.4f}% | Buy on {}, Sell on {}",
+                number, opportunity.net_profit_pct,
+                opportunity.buy_exchange, opportunity.sell_exchange,
+            )
 
-    async def _on_market_data_change(self):
+    async def _on_market_data_change(self, dirty: set[int]):
         """
-        Event-driven callback triggered when Level 1 market data changes.
+        Event-driven callback triggered when Level 1 market data changes, with
+        the ids of the streams that changed since the previous scan.
         This replaces the polling-based scan loop.
         """
+        # Hoist the components out of the attribute chains; this runs on every quote change
+        scanner = self.arbitrage_scanner
+        risk = self.risk_manager
+        executor = self.trade_executor
         try:
             self._scan_count += 1
-            logger.trace(f"Market data change detected, triggering scan #{self._scan_count}")
+            if is_level_enabled("TRACE"):
+                logger.trace("Market data change detected, triggering scan #{}", self._scan_count)
             
-            best_opportunity = self.arbitrage_scanner.scan()
+            best_opportunity = await scanner.scan_async(dirty)
 
             if best_opportunity:
                 self._opportunity_count += 1
-                logger.success(
-                    f"OPPORTUNITY #{self._opportunity_count}: Net Profit {best_opportunity.net_profit_pct:.4f}% | "
-                    f"Buy on {best_opportunity.buy_exchange}, Sell on {best_opportunity.sell_exchange}"
-                )
-
-                if self.risk_manager.is_trade_safe(best_opportunity):
-                    if not self.paper_mode:
-                        execution_result = await self.trade_executor.execute_opportunity(best_opportunity)
-                        
+                self._opportunity_log.put_nowait((self._opportunity_count, best_opportunity))
+
+                if self.paper_mode:
+                    if risk.is_trade_safe(best_opportunity):
+                        logger.info(f"[PAPER MODE] Would execute opportunity: {best_opportunity.symbol}")
+                elif risk.is_trade_safe(best_opportunity):
+                    prepared = executor.prepare_orders(best_opportunity)
+                    if prepared is not None:
+                        execution_result = await executor.submit_orders(prepared)
+
                         # Update PnL based on actual trade execution results
-                        if execution_result and execution_result.get('success'):
-                            buy_order = execution_result.get('buy_order')
-                            sell_order = execution_result.get('sell_order')
+                        if execution_result.success:
+                            buy_order = execution_result.buy_order
+                            sell_order = execution_result.sell_order
                             if buy_order and sell_order:
-                                self.risk_manager.update_pnl_from_orders(buy_order, sell_order)
-                    else:
-                        logger.info(f"[PAPER MODE] Would execute opportunity: {best_opportunity.symbol}")
+                                await risk.update_pnl_from_orders(buy_order, sell_order)
                 
         except Exception as e:
             logger.error(f"Error in market data change callback: {e}")
@@ -183,21 +255,42 @@ class ArbitrageBot:
         """
         Gracefully shuts down the bot and all its components.
         """
-        if not self.running:
+        # Runs once, also when run() exited before starting, so connections get closed
+        if self._shut_down:
             return
 
+        self._shut_down = True
         self.running = False
         logger.info("Cleaning up and shutting down...")
 
         if self._main_task:
             self._main_task.cancel()
+        if self._fee_refresh_task:
+            self._fee_refresh_task.cancel()
+        if self._opportunity_log_task:
+            self._opportunity_log_task.cancel()
+        if self._watchdog_task and self._watchdog_task is not asyncio.current_task():
+            self._watchdog_task.cancel()
+        self._stop_event.set()
 
-        logger.debug("Calling data_fetcher.stop_monitoring()...")
-        await self.data_fetcher.stop_monitoring()
-        logger.debug("Finished data_fetcher.stop_monitoring().")
-        
-        logger.debug("Calling exchange_manager.close_all()...")
-        await self.exchange_manager.close_all()
-        logger.debug("Finished exchange_manager.close_all().")
+        self.arbitrage_scanner.close()
+
+        # Stopping the streams and closing the connections are independent
+        steps = (
+            ("data_fetcher.stop_monitoring()", self.data_fetcher.stop_monitoring()),
+            ("exchange_manager.close_all()", self.exchange_manager.close_all()),
+        )
+        results = await asyncio.gather(*(self._shutdown_step(name, coro) for name, coro in steps),
+                                       return_exceptions=True)
+        for (name, _), result in zip(steps, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error in {name} during shutdown: {result}")
+
+        logger.info("Shutdown complete.")
 
-        logger.info("Shutdown complete.") 
\ No newline at end of file
+    @staticmethod
+    async def _shutdown_step(name: str, coro: Awaitable):
+        """Awaits one step of the shutdown between debug log bookends."""
+        logger.debug(f"Calling {name}...")
+        await coro
+        logger.debug(f"Finished {name}.")
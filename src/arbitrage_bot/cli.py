@@ -6,6 +6,11 @@ from loguru import logger
 from arbitrage_bot.bot import ArbitrageBot
 from arbitrage_bot.logging.setup import setup_logging
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 
 def main():
     """
@@ -29,40 +34,58 @@ def main():
     if args.paper:
         logger.info("Running in paper trading mode.")
     
-    # Get the asyncio event loop
-    loop = asyncio.get_event_loop()
+    # Use the libuv-based event loop when available; it is a drop-in replacement.
+    # uvloop.run creates the loop directly instead of replacing the global event
+    # loop policy, which is deprecated from Python 3.14.
+    run = asyncio.run
+    if uvloop is not None:
+        run = uvloop.run
+        logger.info("Using uvloop event loop.")
 
-    # The main async function that creates and runs the bot
-    async def async_main():
-        bot = await ArbitrageBot.create(paper_mode=args.paper)
+    try:
+        run(async_main(paper_mode=args.paper))
+    finally:
+        logger.info("Event loop stopped. Closing.")
 
-        # --- Graceful Shutdown Logic ---
-        shutdown_signals = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
 
-        async def shutdown(sig: signal.Signals):
-            logger.warning(f"Received exit signal {sig.name}...")
-            await bot.shutdown()
-            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
-            for task in tasks:
-                task.cancel()
-            await asyncio.gather(*tasks, return_exceptions=True)
-            logger.info("All tasks cancelled, stopping event loop.")
-            loop.stop()
+async def async_main(paper_mode: bool):
+    """
+    Creates the bot and runs it until it stops by itself (e.g. after an emergency
+    stop) or an exit signal is received.
+    """
+    loop = asyncio.get_running_loop()
+    # Run new tasks eagerly up to their first await instead of scheduling
+    # them for the next loop iteration (available from Python 3.12)
+    if hasattr(asyncio, "eager_task_factory"):
+        loop.set_task_factory(asyncio.eager_task_factory)
+
+    bot = await ArbitrageBot.create(paper_mode=paper_mode)
+
+    # --- Graceful Shutdown Logic ---
+    shutdown_event = asyncio.Event()
 
-        for s in shutdown_signals:
-            loop.add_signal_handler(s, lambda s=s: asyncio.create_task(shutdown(s)))
-        # ---------------------------------
+    def on_exit_signal(sig: signal.Signals):
+        logger.warning(f"Received exit signal {sig.name}...")
+        shutdown_event.set()
 
-        await bot.run()
+    for s in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(s, on_exit_signal, s)
+    # ---------------------------------
 
-    # Run the main async function until it's stopped
     try:
-        loop.create_task(async_main())
-        loop.run_forever()
+        async with asyncio.TaskGroup() as tg:
+            run_task = tg.create_task(bot.run())
+            signal_task = tg.create_task(shutdown_event.wait())
+            await asyncio.wait((run_task, signal_task), return_when=asyncio.FIRST_COMPLETED)
+            signal_task.cancel()
+            # Makes run() return if it is still running; a no-op if it already shut down
+            await bot.shutdown()
     finally:
-        logger.info("Event loop stopped. Closing.")
-        loop.close()
+        # If run() raised, the TaskGroup re-raises it as an ExceptionGroup before
+        # the shutdown above; close the connections anyway
+        await bot.shutdown()
+    logger.info("Bot stopped.")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
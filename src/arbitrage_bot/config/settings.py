@@ -1,7 +1,13 @@
+import asyncio
+import dataclasses
+import functools
 import os
+import sys
+import types
 import yaml
 from dotenv import load_dotenv
 from pathlib import Path
+from typing import Mapping, Optional
 
 # Important: The user should create a `.env` file in the project root.
 # They can copy the structure from `.env.example`.
@@ -12,10 +18,76 @@ from pathlib import Path
 # KRAKEN_API_SECRET="YOUR_KRAKEN_API_SECRET"
 # --------------------
 
-# Load environment variables from .env file
-# The search path for the .env file starts from this file's location and goes upwards.
+# The .env file is looked up in the project root, four levels up from this file
 env_path = Path(__file__).parent.parent.parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+
+# libyaml's C parser when PyYAML was built with it, the pure-Python one otherwise
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ConnectionParams:
+    """Typed, read-only view of the `connection` section, with its defaults."""
+    max_concurrent_loads: int = 4
+    load_markets_timeout_s: float = 15
+    request_timeout_ms: int = 10000
+    markets_cache_ttl_s: float = 86400
+    max_connections: int = 200
+    dns_cache_ttl_s: int = 300
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ArbitrageParams:
+    """Typed, read-only view of the `arbitrage` section, with its defaults."""
+    min_profit_threshold: float = 0.1
+    max_trade_size: float = 100.0
+    max_slippage: float = 0.1
+    scan_cooldown_ms: float = 500
+    warmup_timeout_s: float = 10
+    scan_workers: int = 1
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class RiskParams:
+    """Typed, read-only view of the `risk_management` section, with its defaults."""
+    max_open_trades: int = 5
+    emergency_check_interval_s: float = 30
+    emergency_stop_loss_pct: float = 10.0
+    pnl_file: str = 'pnl_report.json'
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ExchangeParams:
+    """Typed, read-only view of one entry of the `exchanges` section."""
+    name: str
+    id: str  # ccxt exchange id, the entry's name unless `id` is set
+    enabled: bool = False
+    symbols: tuple[str, ...] = ()
+    params: Mapping = dataclasses.field(default_factory=dict)  # Extra ccxt constructor options
+    api_key: Optional[str] = dataclasses.field(default=None, repr=False)
+    secret: Optional[str] = dataclasses.field(default=None, repr=False)
+
+
+def _as_dict(value):
+    """Converts nested Config objects back into plain dictionaries."""
+    if isinstance(value, Config):
+        return {key: _as_dict(item) for key, item in value.items()}
+    return value
+
+
+def _load_yaml(config_file: Path) -> dict:
+    """
+    Parses the YAML config file. get_config() keeps the result for the life of
+    the process, so it is parsed once per start.
+    """
+    with open(config_file, 'r') as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
+
+
+def _make_params(params_cls, data: dict):
+    """Builds a params dataclass from a config section, ignoring unknown keys."""
+    names = {f.name for f in dataclasses.fields(params_cls)}
+    return params_cls(**{key: value for key, value in (data or {}).items() if key in names})
+
 
 class Config:
     """
@@ -24,22 +96,27 @@ class Config:
     using dot notation.
     """
     def __init__(self, config_path: str = 'config.yaml'):
-        # Load environment variables from .env file
-        load_dotenv()
+        # Load environment variables from the project's .env file
+        load_dotenv(dotenv_path=env_path)
 
         # Load base configuration from YAML
         config_file = Path(config_path)
         if not config_file.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
-        with open(config_file, 'r') as f:
-            yaml_config = yaml.safe_load(f)
+        yaml_config = _load_yaml(config_file)
 
         # Recursively set attributes
         self._set_attributes(yaml_config)
 
+        # Typed views of the sections read by the bot's components
+        self.connection_params = _make_params(ConnectionParams, yaml_config.get('connection'))
+        self.arbitrage_params = _make_params(ArbitrageParams, yaml_config.get('arbitrage'))
+        self.risk_params = _make_params(RiskParams, yaml_config.get('risk_management'))
+
         # Override with environment variables if they exist
         self._override_with_env_vars()
+        self._intern_exchange_keys()
 
     def _set_attributes(self, data: dict):
         """
@@ -62,18 +139,53 @@ class Config:
     def _override_with_env_vars(self):
         """
         Overrides YAML config with environment variables.
-        Specifically looks for API keys and secrets for exchanges.
+        Specifically looks for API keys and secrets for exchanges, and records the
+        exchanges that have both in `usable_exchanges`.
         """
+        self.usable_exchanges: set[str] = set()
         if hasattr(self, 'exchanges'):
             # self.exchanges is a Config object, but .items() will work
             for exchange_name, exchange_config in self.exchanges.items():
-                api_key_env = f"{exchange_name.upper()}_API_KEY"
-                secret_env = f"{exchange_name.upper()}_SECRET"
+                prefix = exchange_name.upper()
+                api_key = os.environ.get(f"{prefix}_API_KEY")
+                # <NAME>_API_SECRET as documented, <NAME>_SECRET for older .env files
+                secret = os.environ.get(f"{prefix}_API_SECRET") or os.environ.get(f"{prefix}_SECRET")
 
-                if os.getenv(api_key_env):
-                    setattr(exchange_config, 'api_key', os.getenv(api_key_env))
-                if os.getenv(secret_env):
-                    setattr(exchange_config, 'secret', os.getenv(secret_env))
+                if api_key:
+                    setattr(exchange_config, 'api_key', api_key)
+                if secret:
+                    setattr(exchange_config, 'secret', secret)
+                if exchange_config.get('api_key') and exchange_config.get('secret'):
+                    self.usable_exchanges.add(exchange_name)
+
+    def _intern_exchange_keys(self):
+        """
+        Interns the exchange names and their symbols. They key the bot's lookup
+        tables and every opportunity, so equal keys become the same object and
+        dict lookups succeed on the identity check.
+        """
+        self.exchange_names: tuple[str, ...] = ()
+        self.exchange_params: Mapping[str, ExchangeParams] = types.MappingProxyType({})
+        if not hasattr(self, 'exchanges'):
+            return
+        exchange_params = {}
+        for exchange_name, exchange_config in self.exchanges.items():
+            exchange_name = sys.intern(exchange_name)
+            symbols = [sys.intern(symbol) for symbol in exchange_config.get('symbols') or ()]
+            if symbols:
+                exchange_config.symbols = symbols
+            exchange_params[exchange_name] = ExchangeParams(
+                name=exchange_name,
+                id=exchange_config.get('id', exchange_name),
+                enabled=bool(exchange_config.get('enabled')),
+                symbols=tuple(symbols),
+                params=types.MappingProxyType(_as_dict(exchange_config.get('params')) or {}),
+                api_key=exchange_config.get('api_key'),
+                secret=exchange_config.get('secret'),
+            )
+        self.exchange_names = tuple(exchange_params)
+        # Frozen views of the exchange entries, built once for the bot's components
+        self.exchange_params = types.MappingProxyType(exchange_params)
 
     def get(self, key, default=None):
         """Provides a .get() method, similar to a dictionary."""
@@ -83,5 +195,18 @@ class Config:
         """Allows iterating over key-value pairs, like a dictionary."""
         return vars(self).items()
 
-# Singleton instance to be used across the application
-config = Config() 
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """
+    Returns the application's configuration. It is loaded on the first call and
+    shared by all later calls, so importing this module has no side effects.
+    """
+    return Config()
+
+
+async def load_config() -> Config:
+    """
+    Returns the application's configuration from a coroutine. The first load reads
+    files, so it runs in a worker thread to keep the event loop responsive.
+    """
+    return await asyncio.to_thread(get_config)
@@ -1,11 +1,14 @@
 import asyncio
 import ccxt.pro
 from loguru import logger
-from typing import Dict, List, Any, Callable, Optional
+from typing import Dict, List, Any, Awaitable, Callable, Optional, Tuple
 from collections import defaultdict
 import time
 
+from arbitrage_bot.config.settings import get_config
 from arbitrage_bot.exchange.manager import ExchangeManager
+from arbitrage_bot.logging.setup import is_level_enabled
+from arbitrage_bot.model import Quote
 from arbitrage_bot.utils.error_handler import ErrorHandler
 
 class DataFetcher:
@@ -20,168 +23,248 @@ class DataFetcher:
         # A nested defaultdict to store order books: {exchange_name: {symbol: order_book}}
         # This prevents KeyErrors when accessing nested dictionaries for the first time.
         self._order_books: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        # Every (exchange, symbol) stream gets a small integer id, used to index
+        # `streams` and `quotes` and to report changed books without string hashing.
+        # Each quote is updated in place. ccxt keeps mutating the same order book
+        # object, so the previous best bid/ask must be kept separately to detect changes.
+        self._stream_ids: Dict[Tuple[str, str], int] = {}
+        self.streams: List[Tuple[str, str]] = []
+        self.quotes: List[Quote] = []
+        # Per stream, set once it has produced its first two-sided quote
+        self._ready: List[asyncio.Event] = []
+        # Per stream, resolved once: its exchange's order book dict and its stats key
+        self._book_maps: List[Dict[str, Any]] = []
+        self._stat_keys: List[str] = []
+        # Per stream activity counters: all updates, and those that changed Level 1
+        self._update_counts: List[int] = []
+        self._level1_change_counts: List[int] = []
+        # Computed once: {exchange_name: [symbols]} of the enabled exchanges. The flat
+        # list of all (exchange, symbol) pairs is `streams`, registered in the same order.
         self.active_symbols = self._get_active_symbols()
+        for exchange_name, symbols in self.active_symbols.items():
+            for symbol in symbols:
+                self._stream_id(exchange_name, symbol)
         self._monitoring_task = None
         self._is_monitoring = False
         
         # Event-driven architecture
-        self._scan_callback: Optional[Callable[[str], Any]] = None
-        self._last_scan_time = 0
-        # Get scan cooldown from config (convert ms to seconds)
-        from arbitrage_bot.config.settings import config
-        cooldown_ms = config.arbitrage.get('scan_cooldown_ms', 500)
-        self._scan_cooldown = cooldown_ms / 1000.0  # Convert to seconds
-        self._pending_symbols = set()  # Symbols that need scanning
+        self._scan_callback: Optional[Callable[[set[int]], Awaitable[Any]]] = None
+        # Timings use integer nanoseconds of the monotonic clock, which wall-clock
+        # adjustments (e.g. NTP) cannot move
+        self._last_scan_ns = 0
+        cooldown_ms = get_config().arbitrage_params.scan_cooldown_ms
+        self._scan_cooldown_ns = int(cooldown_ms * 1_000_000)
+        # Ids of the streams whose Level 1 changed since the scanner last looked
+        self._dirty: set[int] = set()
+        # The set handed out by the previous pop_dirty(), cleared and reused by the next
+        self._dirty_spare: set[int] = set()
+        # Set by the order book watchers whenever there is new Level 1 data to scan
+        self._wake = asyncio.Event()
         
         # Heartbeat and activity tracking
-        self._last_heartbeat = 0
-        self._heartbeat_interval = 30  # seconds
-        self._update_counts = defaultdict(int)  # Track updates per symbol
-        self._level1_change_counts = defaultdict(int)  # Track Level 1 changes per symbol
+        self._heartbeat_interval_s = 30
 
     def _get_active_symbols(self) -> dict:
         """
         Gets a list of common symbols that are active on all enabled exchanges.
         """
         active_symbols = {}
-        # The structure is now self.exchange_manager.config which holds the exchanges dict
+        # self.exchange_manager.config maps exchange names to their ExchangeParams
         for exchange_name, settings in self.exchange_manager.config.items():
-            if settings.get("enabled"):
-                symbols = settings.get("symbols", [])
-                active_symbols[exchange_name] = symbols
+            if settings.enabled:
+                active_symbols[exchange_name] = list(settings.symbols)
         return active_symbols
 
-    def register_scan_callback(self, callback: Callable[[str], Any]):
+    def _stream_id(self, exchange_name: str, symbol: str) -> int:
+        """Returns the id of an (exchange, symbol) stream, registering it if it is new."""
+        key = (exchange_name, symbol)
+        stream_id = self._stream_ids.get(key)
+        if stream_id is None:
+            stream_id = self._stream_ids[key] = len(self.streams)
+            self.streams.append(key)
+            self.quotes.append(Quote())
+            self._ready.append(asyncio.Event())
+            self._book_maps.append(self._order_books[exchange_name])
+            self._stat_keys.append(f"{exchange_name}:{symbol}")
+            self._update_counts.append(0)
+            self._level1_change_counts.append(0)
+        return stream_id
+
+    def register_scan_callback(self, callback: Callable[[set[int]], Awaitable[Any]]):
         """
-        Register a callback function that will be called when order book changes
-        should trigger a scan for the given symbol.
+        Register a coroutine function that will be called when order book changes
+        should trigger a scan, with the ids of the streams that changed.
         """
         self._scan_callback = callback
         logger.info("Registered scan callback for event-driven arbitrage scanning")
 
-    def _has_level1_changed(self, old_book: Dict[str, Any], new_book: Dict[str, Any]) -> bool:
+    async def _scan_loop(self):
         """
-        Check if Level 1 data (best bid/ask) has changed significantly.
+        Runs the scan callback whenever new Level 1 data has arrived, at most once
+        per cooldown period. Updates that arrive during the cooldown are not lost:
+        they are picked up by the next scan.
         """
-        if not old_book or not new_book:
-            return True  # First update or missing data
-            
-        # Check if best bid or ask has changed
-        old_best_bid = old_book.get('bids', [[None]])[0][0] if old_book.get('bids') else None
-        new_best_bid = new_book.get('bids', [[None]])[0][0] if new_book.get('bids') else None
-        
-        old_best_ask = old_book.get('asks', [[None]])[0][0] if old_book.get('asks') else None
-        new_best_ask = new_book.get('asks', [[None]])[0][0] if new_book.get('asks') else None
-        
-        return (old_best_bid != new_best_bid) or (old_best_ask != new_best_ask)
+        while self._is_monitoring:
+            await self._wake.wait()
 
-    async def _trigger_scan_if_needed(self, symbol: str):
-        """
-        Trigger scan callback if conditions are met and cooldown has passed.
-        """
-        if not self._scan_callback:
-            return
-            
-        current_time = time.time()
-        
-        # Add symbol to pending list
-        self._pending_symbols.add(symbol)
-        
-        # Check cooldown
-        if current_time - self._last_scan_time < self._scan_cooldown:
-            return  # Wait for cooldown
-            
-        # Trigger scan for all pending symbols
-        if self._pending_symbols:
-            pending_count = len(self._pending_symbols)
-            logger.trace(f"Triggering scan for {pending_count} symbols: {self._pending_symbols}")
-            
-            # Call the scan callback (non-blocking)
-            try:
-                # Create a task to run the callback without blocking WebSocket updates
-                asyncio.create_task(self._run_scan_callback())
-                self._last_scan_time = current_time
-                self._pending_symbols.clear()
-                logger.trace(f"Scan task created successfully")
-            except Exception as e:
-                logger.error(f"Error triggering scan callback: {e}")
-                
-    async def _run_scan_callback(self):
+            remaining_ns = self._last_scan_ns + self._scan_cooldown_ns - time.monotonic_ns()
+            if remaining_ns > 0:
+                await asyncio.sleep(remaining_ns / 1e9)
+
+            # Clear and drain before scanning so updates made during the scan trigger
+            # another one. A whole cooldown's worth of updates is scanned at once.
+            self._wake.clear()
+            self._last_scan_ns = time.monotonic_ns()
+            dirty = self.pop_dirty()
+            if is_level_enabled("TRACE"):
+                logger.trace("Triggering scan for {} changed order books", len(dirty))
+            await self._run_scan_callback(dirty)
+
+    async def _run_scan_callback(self, dirty: set[int]):
         """
-        Run the scan callback in a separate task to avoid blocking WebSocket updates.
+        Run the scan callback, logging any errors so the scan loop keeps running.
         """
         try:
             if self._scan_callback:
-                await self._scan_callback()
+                await self._scan_callback(dirty)
         except Exception as e:
-            logger.error(f"Error in scan callback: {e}")
+            logger.error("Error in scan callback: {}", e)
+
+    async def _heartbeat_loop(self):
+        """
+        Logs a heartbeat every heartbeat interval while monitoring, to show the
+        system is alive and working. Runs as its own task next to the watchers.
+        """
+        while self._is_monitoring:
+            await asyncio.sleep(self._heartbeat_interval_s)
+            self._log_heartbeat()
 
     def _log_heartbeat(self):
         """
-        Log periodic heartbeat to show the system is alive and working.
+        Log the heartbeat with the activity counters.
         """
-        current_time = time.time()
-        if current_time - self._last_heartbeat >= self._heartbeat_interval:
-            total_updates = sum(self._update_counts.values())
-            total_level1_changes = sum(self._level1_change_counts.values())
-            
-            logger.info(f"[HEARTBEAT] WebSocket active - "
-                       f"Total updates: {total_updates}, "
-                       f"Level 1 changes: {total_level1_changes}, "
-                       f"Monitoring {len(self.active_symbols)} exchanges")
-            
-            # Log detailed stats if there's activity
-            if total_updates > 0:
-                logger.debug(f"[ACTIVITY] Update stats: {dict(self._update_counts)}")
-                logger.debug(f"[ACTIVITY] Level 1 change stats: {dict(self._level1_change_counts)}")
-            
-            self._last_heartbeat = current_time
+        total_updates = sum(self._update_counts)
+        total_level1_changes = sum(self._level1_change_counts)
+
+        logger.info("[HEARTBEAT] WebSocket active - Total updates: {}, Level 1 changes: {}, "
+                    "Monitoring {} exchanges", total_updates, total_level1_changes, len(self.active_symbols))
+
+        # Log detailed stats if there's activity
+        if total_updates > 0:
+            # lazy: the per-stream dicts are only built if a sink accepts DEBUG records
+            logger.opt(lazy=True).debug("[ACTIVITY] Update stats: {}",
+                                        lambda: self._counts_by_stream(self._update_counts))
+            logger.opt(lazy=True).debug("[ACTIVITY] Level 1 change stats: {}",
+                                        lambda: self._counts_by_stream(self._level1_change_counts))
+
+    def _counts_by_stream(self, counts: List[int]) -> Dict[str, int]:
+        """Maps the stats keys of the streams with a non-zero count to their counts."""
+        return {key: count for key, count in zip(self._stat_keys, counts) if count}
+
+    def _handle_update(self, exchange_name: str, symbol: str, stream_id: int, order_book: Dict[str, Any]):
+        """
+        Stores a new order book for a stream and, if its Level 1 changed, updates the
+        stream's quote and wakes the scan loop.
+        """
+        # Update stored order book
+        self._book_maps[stream_id][symbol] = order_book
+
+        # Check if Level 1 data has changed; a book missing either side
+        # counts as not quoted at all
+        quote = self.quotes[stream_id]
+        bids = order_book.get('bids')
+        asks = order_book.get('asks')
+        if bids and asks:
+            bid, ask = bids[0][0], asks[0][0]
+        else:
+            bid, ask = float('-inf'), float('inf')
+        level1_changed = bid != quote.bid or ask != quote.ask
+        # TRACE is normally off: skip the per-update records entirely
+        trace_enabled = is_level_enabled("TRACE")
+        
+        # Track activity stats
+        self._update_counts[stream_id] += 1
+        
+        if level1_changed:
+            quote.bid, quote.ask = bid, ask
+            quote.seq += 1
+            if ask != float('inf'):
+                self._ready[stream_id].set()
+            self._level1_change_counts[stream_id] += 1
+            self._dirty.add(stream_id)
+            if trace_enabled:
+                logger.trace("Level 1 change detected for {} on {}", symbol, exchange_name)
+            # Wake the scan loop
+            if self._scan_callback:
+                self._wake.set()
+        elif trace_enabled:
+            logger.trace("Order book update (no Level 1 change) for {} on {}", symbol, exchange_name)
 
     async def _watch_order_book(self, exchange_name: str, symbol: str):
         exchange = self.exchange_manager.exchanges[exchange_name]
-        logger.info(f"Subscribing to order book for {symbol} on {exchange_name}")
+        logger.info("Subscribing to order book for {} on {}", symbol, exchange_name)
         
         component_id = f"{exchange_name}_{symbol}_orderbook"
+        stream_id = self._stream_id(exchange_name, symbol)
 
+        # The circuit of this component only changes through the error calls below,
+        # so it can only be open, and only needs resetting, after a failure
+        failing = False
         while self._is_monitoring:
-            if self.error_handler.is_circuit_open(component_id):
+            if failing and self.error_handler.is_circuit_open(component_id):
                 await asyncio.sleep(10) # Wait longer if circuit is open
                 continue
 
             try:
-                # Store old order book for comparison
-                old_order_book = self._order_books[exchange_name].get(symbol)
-                
                 # Get new order book
                 new_order_book = await exchange.watch_order_book(symbol)
-                
-                # Check if Level 1 data has changed
-                level1_changed = self._has_level1_changed(old_order_book, new_order_book)
-                
-                # Update stored order book
-                self._order_books[exchange_name][symbol] = new_order_book
-                
-                # Track activity stats
-                symbol_key = f"{exchange_name}:{symbol}"
-                self._update_counts[symbol_key] += 1
-                
-                if level1_changed:
-                    self._level1_change_counts[symbol_key] += 1
-                    logger.trace(f"Level 1 change detected for {symbol} on {exchange_name}")
-                    # Trigger scan asynchronously
-                    await self._trigger_scan_if_needed(symbol)
-                else:
-                    logger.trace(f"Order book update (no Level 1 change) for {symbol} on {exchange_name}")
-                
-                # Log periodic heartbeat
-                self._log_heartbeat()
-                
-                self.error_handler.reset_error(component_id) # Reset on success
+                self._handle_update(exchange_name, symbol, stream_id, new_order_book)
+                if failing:
+                    self.error_handler.reset_error(component_id) # Reset on success
+                    failing = False
+            except Exception as e:
+                logger.opt(exception=True).error("Error watching order book for {} on {}: {}", symbol, exchange_name, e)
+                self.error_handler.record_error(component_id)
+                failing = True
+                delay = self.error_handler.get_backoff_delay(component_id)
+                logger.info("Backing off for {:.2f}s before retrying {}...", delay, component_id)
+                await asyncio.sleep(delay)
+
+    async def _watch_order_books(self, exchange_name: str, symbols: List[str]):
+        """
+        Watches the order books of all given symbols of an exchange through a single
+        multiplexed subscription; each update is dispatched to its symbol's stream.
+        """
+        exchange = self.exchange_manager.exchanges[exchange_name]
+        logger.info("Subscribing to order books for {} symbols on {}: {}", len(symbols), exchange_name, ', '.join(symbols))
+
+        component_id = f"{exchange_name}_orderbooks"
+        stream_ids = {symbol: self._stream_id(exchange_name, symbol) for symbol in symbols}
+
+        # The circuit of this component only changes through the error calls below,
+        # so it can only be open, and only needs resetting, after a failure
+        failing = False
+        while self._is_monitoring:
+            if failing and self.error_handler.is_circuit_open(component_id):
+                await asyncio.sleep(10) # Wait longer if circuit is open
+                continue
+
+            try:
+                # Returns the order book of whichever symbol was updated
+                new_order_book = await exchange.watch_order_book_for_symbols(symbols)
+                symbol = new_order_book.get('symbol')
+                stream_id = stream_ids.get(symbol)
+                if stream_id is not None:
+                    self._handle_update(exchange_name, symbol, stream_id, new_order_book)
+                if failing:
+                    self.error_handler.reset_error(component_id) # Reset on success
+                    failing = False
             except Exception as e:
-                logger.error(f"Error watching order book for {symbol} on {exchange_name}: {e}")
+                logger.opt(exception=True).error("Error watching order books on {}: {}", exchange_name, e)
                 self.error_handler.record_error(component_id)
-                delay = await self.error_handler.get_backoff_delay(component_id)
-                logger.info(f"Backing off for {delay:.2f}s before retrying {component_id}...")
+                failing = True
+                delay = self.error_handler.get_backoff_delay(component_id)
+                logger.info("Backing off for {:.2f}s before retrying {}...", delay, component_id)
                 await asyncio.sleep(delay)
 
     def start_monitoring(self):
@@ -191,15 +274,33 @@ class DataFetcher:
 
         self._is_monitoring = True
         tasks = []
-        total_streams = 0
         for exchange_name, symbols in self.active_symbols.items():
-            for symbol in symbols:
-                tasks.append(self._watch_order_book(exchange_name, symbol))
-                total_streams += 1
+            capabilities = self.exchange_manager.capabilities.get(exchange_name)
+            if capabilities is not None and len(symbols) > 1 and capabilities.watch_order_book_for_symbols:
+                # One multiplexed subscription for all of the exchange's symbols
+                tasks.append(self._watch_order_books(exchange_name, symbols))
+            else:
+                for symbol in symbols:
+                    tasks.append(self._watch_order_book(exchange_name, symbol))
+        watcher_count = len(tasks)
+        tasks.append(self._scan_loop())
+        tasks.append(self._heartbeat_loop())
         
-        self._monitoring_task = asyncio.gather(*tasks)
-        logger.info(f"Started data fetcher monitoring for {total_streams} WebSocket streams across {len(self.active_symbols)} exchanges")
-        logger.info(f"Heartbeat interval: {self._heartbeat_interval}s, Scan cooldown: {self._scan_cooldown}s")
+        self._monitoring_task = asyncio.create_task(self._run_watchers(tasks), name="data-fetcher")
+        logger.info("Started data fetcher monitoring for {} WebSocket streams across {} exchanges using {} watchers",
+                    len(self.streams), len(self.active_symbols), watcher_count)
+        logger.info("Heartbeat interval: {}s, Scan cooldown: {:g}s",
+                    self._heartbeat_interval_s, self._scan_cooldown_ns / 1e9)
+
+    @staticmethod
+    async def _run_watchers(watchers: List[Awaitable[Any]]):
+        """
+        Runs the watchers and the scan loop as one task group. Cancelling the task
+        running this (see stop_monitoring) cancels all of them together.
+        """
+        async with asyncio.TaskGroup() as tg:
+            for watcher in watchers:
+                tg.create_task(watcher)
 
     async def stop_monitoring(self):
         """Stops the monitoring task gracefully."""
@@ -214,7 +315,7 @@ class DataFetcher:
             logger.info("Monitoring task was already done.")
             return
 
-        logger.debug(f"Cancelling monitoring task {id(self._monitoring_task)}...")
+        logger.debug("Cancelling monitoring task {}...", id(self._monitoring_task))
         self._monitoring_task.cancel()
         
         try:
@@ -226,10 +327,43 @@ class DataFetcher:
             self._monitoring_task = None
             logger.info("Stopped data fetcher monitoring.")
 
+    async def wait_ready(self, timeout: float) -> List[Tuple[str, str]]:
+        """
+        Waits until every monitored stream has produced its first quote, or until
+        the timeout expires.
+
+        Returns:
+            The (exchange, symbol) streams that still have no quote.
+        """
+        try:
+            await asyncio.wait_for(asyncio.gather(*(event.wait() for event in self._ready)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return [self.streams[i] for i, event in enumerate(self._ready) if not event.is_set()]
+
     def get_order_book(self, exchange_name: str, symbol: str) -> Dict[str, Any]:
         """Returns the latest order book for a specific exchange and symbol."""
         return self._order_books.get(exchange_name, {}).get(symbol)
 
+    def get_quote(self, exchange_name: str, symbol: str) -> Optional[Quote]:
+        """
+        Returns the live Level 1 quote for a specific exchange and symbol. The
+        object is updated in place by the watcher and must not be modified.
+        """
+        stream_id = self._stream_ids.get((exchange_name, symbol))
+        return self.quotes[stream_id] if stream_id is not None else None
+
+    def pop_dirty(self) -> set[int]:
+        """
+        Returns the ids of the streams whose Level 1 changed since the last call
+        (see `streams` and `quotes`) and starts a fresh set for subsequent updates. The two sets are swapped
+        and reused, so the returned set is only valid until the next call.
+        """
+        dirty = self._dirty
+        self._dirty_spare.clear()
+        self._dirty, self._dirty_spare = self._dirty_spare, dirty
+        return dirty
+
     def get_all_order_books(self) -> Dict[str, Dict[str, Any]]:
         """Returns all currently stored order books."""
         return self._order_books 
\ No newline at end of file
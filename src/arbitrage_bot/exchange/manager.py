@@ -1,37 +1,104 @@
 import asyncio
-from typing import Dict, Optional, TYPE_CHECKING
+import contextlib
+import dataclasses
+import importlib
+import os
+import ssl
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, Mapping, Optional, Tuple, TYPE_CHECKING
+import aiohttp
+import certifi
 import ccxt.pro as ccxt
+from ccxt.async_support.base.ws import client as ccxt_ws_client
 from loguru import logger
 import orjson
 
-from arbitrage_bot.config.settings import config
+from arbitrage_bot.config.settings import ConnectionParams
 
 if TYPE_CHECKING:
+    from arbitrage_bot.config.settings import ExchangeParams
     from arbitrage_bot.utils.error_handler import ErrorHandler
 
+# The module defining ccxt's JSON codecs; `from ccxt.base import exchange` would
+# resolve to the `exchange` name that ccxt.base re-exports instead
+ccxt_base_exchange = importlib.import_module('ccxt.base.exchange')
+
+# Markets fetched by load_markets() are kept on disk (for the `markets_cache_ttl_s`
+# connection setting), so restarts do not have to download every exchange's market
+# metadata again
+MARKETS_CACHE_DIR = Path.home() / '.cache' / 'arbitrage_bot' / 'markets'
+
+# Seconds to wait for an exchange's connections to close on shutdown
+CLOSE_TIMEOUT_S = 5
+
+# ccxt constructor options that configure the exchange's own HTTP session (TLS
+# verification, CA bundle, environment proxies); exchanges setting any of them
+# keep a session of their own instead of sharing one
+OWN_SESSION_PARAMS: FrozenSet[str] = frozenset((
+    'session', 'verify', 'cafile', 'ssl_context', 'tcp_connector', 'aiohttp_trust_env', 'asyncio_loop',
+))
+
+# Currencies kept during an emergency liquidation, in order of preference as the
+# currency other assets are sold for
+LIQUIDATION_QUOTES: Tuple[str, ...] = ('USDT', 'USD', 'BUSD', 'USDC')
+# The same currencies as a set, for membership tests on every balance entry
+LIQUIDATION_QUOTE_SET: FrozenSet[str] = frozenset(LIQUIDATION_QUOTES)
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ExchangeCapabilities:
+    """The ccxt `has` flags the bot relies on, read once when an exchange connects."""
+    cancel_all_orders: bool = False
+    fetch_balance: bool = False
+    fetch_trading_fees: bool = False
+    watch_order_book_for_symbols: bool = False
+
+    @classmethod
+    def from_has(cls, has: dict) -> "ExchangeCapabilities":
+        # ccxt marks emulated methods as 'emulated', which also counts as supported
+        return cls(
+            cancel_all_orders=bool(has.get('cancelAllOrders')),
+            fetch_balance=bool(has.get('fetchBalance')),
+            fetch_trading_fees=bool(has.get('fetchTradingFees')),
+            watch_order_book_for_symbols=bool(has.get('watchOrderBookForSymbols')),
+        )
+
 
 class ExchangeManager:
     """
     Manages all exchange connections and provides a central point of access.
-    Implements a singleton pattern to ensure only one instance exists.
+    Only one instance should exist; get it with `ExchangeManager.instance()`.
     """
-    _instance = None
+    _instance: Optional["ExchangeManager"] = None
 
-    def __new__(cls, *args, **kwargs):
+    @classmethod
+    def instance(cls, config: dict, error_handler: "ErrorHandler") -> "ExchangeManager":
+        """
+        Returns the shared ExchangeManager, creating it on the first call. Later
+        calls return the same instance and ignore their arguments.
+        """
         if cls._instance is None:
-            cls._instance = super(ExchangeManager, cls).__new__(cls)
+            cls._instance = cls(config, error_handler)
         return cls._instance
 
     def __init__(self, config: dict, error_handler: "ErrorHandler"):
         """
-        Initializes the ExchangeManager.
-        The check 'hasattr(self, 'config')' prevents re-initialization.
+        Initializes the ExchangeManager. Use `instance()` instead of calling this
+        directly, so the bot's components share one set of connections.
         """
-        if hasattr(self, 'config'):
-            return # Already initialized
-            
-        self.config = config.get("exchanges", {})
+        self.config: Mapping[str, "ExchangeParams"] = config.get("exchange_params", {})
+        # Exchanges with both an API key and a secret configured
+        self.usable_exchanges: set[str] = config.get("usable_exchanges", set())
+        self.connection_params: ConnectionParams = config.get("connection_params", ConnectionParams())
+        # Bounds the concurrent market downloads, so startup does not hit rate limits
+        self._load_limit = asyncio.Semaphore(self.connection_params.max_concurrent_loads)
         self.exchanges: dict[str, ccxt.Exchange] = {}
+        self.capabilities: Dict[str, ExchangeCapabilities] = {}
+        # Per exchange: base currency -> the spot symbol to liquidate it through
+        self.liquidation_symbols: Dict[str, Dict[str, str]] = {}
+        # One HTTP session for all exchanges, created with the first connection
+        self._session: Optional[aiohttp.ClientSession] = None
         self.error_handler = error_handler
 
     async def initialize_exchanges(self):
@@ -39,18 +106,68 @@ class ExchangeManager:
         Initializes connections to all exchanges enabled in the config.
         """
         logger.info("Initializing exchange connections...")
+        self._check_json_parser()
         enabled_exchanges = [
-            name for name, conf in self.config.items() if conf.get("enabled")
+            name for name, conf in self.config.items() if conf.enabled
         ]
 
         if not enabled_exchanges:
             logger.warning("No exchanges enabled in the configuration.")
             return
 
-        tasks = [self.add_exchange(name) for name in enabled_exchanges]
-        await asyncio.gather(*tasks)
+        missing_credentials = [name for name in enabled_exchanges if name not in self.usable_exchanges]
+        if missing_credentials:
+            logger.warning(f"No API credentials for {', '.join(missing_credentials)}; "
+                           "only public market data is available there (fine for paper trading).")
+
+        # Connect to all exchanges concurrently; one failing does not stop the others.
+        # Each market load has its own timeout (see _load_markets), and failures are
+        # reported as they happen rather than once the slowest exchange is done.
+        await asyncio.gather(*(self._connect(name) for name in enabled_exchanges))
         logger.info(f"Finished exchange initialization. {len(self.exchanges)} connections active.")
 
+    async def _connect(self, exchange_name: str):
+        """Adds one exchange, logging any unexpected error as soon as it is raised."""
+        try:
+            await self.add_exchange(exchange_name)
+        except Exception as e:
+            logger.error(f"Failed to initialize {exchange_name}: {e}")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the HTTP session shared by all exchanges, so they share one pool of
+        keep-alive connections and one DNS cache instead of opening their own.
+        """
+        if self._session is None or self._session.closed:
+            # Verified against certifi's CA bundle, like the sessions ccxt creates itself
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_params.max_connections,
+                ttl_dns_cache=self.connection_params.dns_cache_ttl_s,
+                ssl=ssl.create_default_context(cafile=certifi.where()),
+                enable_cleanup_closed=True,
+            )
+            # trust_env stays off, as in ccxt's own sessions
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @staticmethod
+    def _check_json_parser():
+        """
+        ccxt decodes WebSocket frames and REST responses with orjson if it can import
+        it and silently falls back to the much slower stdlib json otherwise. Make the
+        fallback visible, as every order book update goes through it.
+        """
+        parsers = {
+            "WebSocket frames": getattr(ccxt_ws_client, 'json_parser', None),
+            "REST responses": getattr(ccxt_base_exchange, 'json_parser', None),
+        }
+        for payload, parser in parsers.items():
+            if parser is orjson:
+                logger.debug(f"ccxt is decoding {payload} with orjson.")
+            else:
+                logger.warning(f"ccxt is decoding {payload} with the stdlib json module; "
+                               "check that orjson is installed correctly.")
+
     async def add_exchange(self, exchange_name: str) -> bool:
         """
         Creates and adds a single exchange connection.
@@ -63,26 +180,129 @@ class ExchangeManager:
             logger.error(f"Configuration for exchange '{exchange_name}' not found.")
             return False
 
-        # Use the exchange's name as id if 'id' is not specified in config
-        exchange_id = exchange_config.get("id", exchange_name)
+        # The exchange's name unless 'id' is specified in config
+        exchange_id = exchange_config.id
         
-        if not hasattr(ccxt, exchange_id):
+        exchange_class = getattr(ccxt, exchange_id, None)
+        if exchange_class is None:
             logger.error(f"Exchange '{exchange_id}' is not supported by ccxt.")
             return False
 
-        params = exchange_config.get("params", {})
-        exchange = getattr(ccxt, exchange_id)(params)
+        # Explicit defaults, which the exchange's own params can override
+        params = {
+            'enableRateLimit': True,
+            'timeout': self.connection_params.request_timeout_ms,
+            **exchange_config.params,
+        }
+        options = exchange_config.params.get('options') or {}
+        if OWN_SESSION_PARAMS.isdisjoint(exchange_config.params) and not options.get('include_OS_certificates'):
+            # ccxt does not close sessions it did not create; close_all() closes this one
+            params['session'] = self._get_session()
+        # Only pass credentials when both are set; a lone key or secret fails on first use
+        if exchange_name in self.usable_exchanges:
+            params['apiKey'] = exchange_config.api_key
+            params['secret'] = exchange_config.secret
+        exchange = exchange_class(params)
 
         try:
-            # Test connection - load_markets is a good way to do this
-            await exchange.load_markets()
-            self.exchanges[exchange_name] = exchange
-            logger.success(f"Successfully connected to {exchange_name}.")
-            return True
+            async with contextlib.AsyncExitStack() as stack:
+                # Closes the exchange if anything below fails (or is cancelled)
+                stack.push_async_callback(exchange.close)
+                # Test connection - load_markets is a good way to do this
+                await self._load_markets(exchange_name, exchange)
+                self.liquidation_symbols[exchange_name] = self._index_liquidation_symbols(exchange.markets)
+                self.capabilities[exchange_name] = ExchangeCapabilities.from_has(exchange.has)
+                self.exchanges[exchange_name] = exchange
+                # Connected: the exchange stays open until close_all()
+                stack.pop_all()
+        except asyncio.TimeoutError:
+            logger.error(f"Failed to connect to {exchange_name}: loading markets took longer than "
+                         f"{self.connection_params.load_markets_timeout_s}s")
+            return False
         except Exception as e:
             logger.error(f"Failed to connect to {exchange_name}: {e}")
-            await exchange.close()
-        return False
+            return False
+
+        logger.success(f"Successfully connected to {exchange_name}.")
+        return True
+
+    async def _load_markets(self, exchange_name: str, exchange: ccxt.Exchange):
+        """
+        Loads the exchange's markets from the disk cache if it is fresh, and from
+        the exchange otherwise, refreshing the cache.
+        """
+        path = MARKETS_CACHE_DIR / f"{exchange_name}.json"
+        ttl_s = self.connection_params.markets_cache_ttl_s
+        # A TTL of 0 always downloads the markets, e.g. after a listing change
+        cached = await asyncio.to_thread(self._read_markets_cache, path, ttl_s) if ttl_s > 0 else None
+        # Entries written for another ccxt exchange id (or by older versions) are refetched
+        if cached is not None and cached.get('id') == exchange.id and 'markets' in cached:
+            try:
+                markets = cached['markets']
+                exchange.set_markets(markets, cached.get('currencies'))
+                logger.info(f"Loaded {len(markets)} {exchange_name} markets from {path}")
+                return
+            except Exception as e:
+                logger.warning(f"Ignoring unusable markets cache {path}: {e}")
+                self.invalidate_markets_cache(exchange_name)
+
+        # A slow exchange fails on its own instead of stalling the whole startup
+        async with self._load_limit:
+            await asyncio.wait_for(exchange.load_markets(),
+                                   timeout=self.connection_params.load_markets_timeout_s)
+        cache_entry = {'id': exchange.id, 'markets': exchange.markets, 'currencies': exchange.currencies}
+        await asyncio.to_thread(self._write_markets_cache, path, cache_entry)
+
+    @staticmethod
+    def _index_liquidation_symbols(markets: dict) -> Dict[str, str]:
+        """
+        Maps every base currency to its BASE/QUOTE market with the most preferred
+        of the LIQUIDATION_QUOTES, in one pass over the markets.
+        """
+        rank = {quote: i for i, quote in enumerate(LIQUIDATION_QUOTES)}
+        best: Dict[str, Tuple[int, str]] = {}
+        for symbol, market in markets.items():
+            base, quote = market.get('base'), market.get('quote')
+            quote_rank = rank.get(quote)
+            if quote_rank is None or symbol != f"{base}/{quote}":
+                continue
+            if base not in best or quote_rank < best[base][0]:
+                best[base] = (quote_rank, symbol)
+        return {base: symbol for base, (_, symbol) in best.items()}
+
+    @staticmethod
+    def _read_markets_cache(path: Path, ttl_s: float) -> Optional[dict]:
+        """
+        Returns the cache entry ({'id', 'markets', 'currencies'}), or None if the
+        cache is missing, older than ttl_s seconds or unreadable.
+        """
+        try:
+            if time.time() - path.stat().st_mtime > ttl_s:
+                return None
+            return orjson.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Could not read markets cache {path}: {e}")
+            return None
+
+    @staticmethod
+    def _write_markets_cache(path: Path, cache_entry: dict):
+        """Writes a cache entry atomically, so readers never see a partial file."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(orjson.dumps(cache_entry))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write markets cache {path}: {e}")
+
+    def invalidate_markets_cache(self, exchange_name: str):
+        """Deletes the exchange's cached markets, so the next start fetches them again."""
+        try:
+            (MARKETS_CACHE_DIR / f"{exchange_name}.json").unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not delete the markets cache of {exchange_name}: {e}")
 
     def get_exchange(self, exchange_name: str) -> Optional[ccxt.Exchange]:
         """
@@ -101,7 +321,7 @@ class ExchangeManager:
         
         # Check circuit breaker status
         if self.error_handler.is_circuit_open(exchange_name):
-            logger.warning(f"Circuit for {exchange_name} is open. Temporarily skipping.")
+            logger.warning("Circuit for {} is open. Temporarily skipping.", exchange_name)
             return None
             
         return exchange
@@ -111,8 +331,21 @@ class ExchangeManager:
         Closes all active exchange connections.
         """
         logger.info("Closing all exchange connections...")
-        tasks = [ex.close() for ex in self.exchanges.values()]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        names = list(self.exchanges)
+        # Each close gets its own timeout, so one stuck socket cannot hang the shutdown
+        tasks = [asyncio.create_task(asyncio.wait_for(ex.close(), timeout=CLOSE_TIMEOUT_S))
+                 for ex in self.exchanges.values()]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning(f"Timed out closing the connection to {name} after {CLOSE_TIMEOUT_S}s.")
+            elif isinstance(result, Exception):
+                logger.warning(f"Error closing the connection to {name}: {result}")
         self.exchanges.clear()
+        self.liquidation_symbols.clear()
+        self.capabilities.clear()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
         logger.info("All exchange connections have been closed.")
 
@@ -1,15 +1,15 @@
 from __future__ import annotations
 import asyncio
 import time
-from dataclasses import dataclass
-from typing import Dict, Optional, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 from loguru import logger
 
 from arbitrage_bot.model import Opportunity
-from arbitrage_bot.exchange.manager import ExchangeManager
-from arbitrage_bot.config.settings import config
+from arbitrage_bot.exchange.manager import LIQUIDATION_QUOTE_SET, ExchangeManager
+from arbitrage_bot.config.settings import get_config
 from arbitrage_bot.execution.order_manager import OrderManager
-from arbitrage_bot.models.order import Order
+from arbitrage_bot.models.order import Order, OrderStatus
 
 @dataclass
 class ExecutedTrade:
@@ -20,11 +20,34 @@ class ExecutedTrade:
     buy_order_id: str
     sell_order_id: str
     status: str  # e.g., 'completed', 'failed', 'partial'
-    timestamp: float = time.time()
+    timestamp: float = field(default_factory=time.time)
 
-if TYPE_CHECKING:
-    from arbitrage_bot.exchange.manager import ExchangeManager
-    from arbitrage_bot.execution.order_manager import OrderManager
+
+@dataclass
+class PreparedTrade:
+    """
+    The orders of an arbitrage opportunity, sized and ready to be submitted.
+    """
+    opportunity: Opportunity
+    buy_exchange: Any
+    sell_exchange: Any
+    amount: float
+    buy_price: float
+    sell_price: float
+
+
+@dataclass(slots=True, frozen=True)
+class ExecutionResult:
+    """
+    The outcome of executing an arbitrage opportunity. The orders are the ones
+    the OrderManager tracks, so later status changes show up here too.
+    """
+    success: bool
+    buy_order: Optional[Order] = None
+    sell_order: Optional[Order] = None
+    error: Optional[str] = None
+    message: Optional[str] = None
+    paper_mode: bool = False
 
 class TradeExecutor:
     """
@@ -36,107 +59,144 @@ class TradeExecutor:
         self.exchange_manager = exchange_manager
         self.order_manager = order_manager
         self.paper_mode = paper_mode
-        self.max_trade_size_usd = config.arbitrage.get('max_trade_size', 100.0)
+        self.max_trade_size_usd = get_config().arbitrage_params.max_trade_size
+        # The manager's live dict of connected exchanges, read directly on the hot path
+        self._exchanges = exchange_manager.exchanges
 
-    async def execute_opportunity(self, opportunity: Opportunity) -> Dict[str, any]:
+    async def execute_opportunity(self, opportunity: Opportunity) -> ExecutionResult:
         """
         Executes a buy and a sell order based on the provided arbitrage opportunity.
-        Returns a dictionary with execution results.
+        Returns the execution results.
         """
-        logger.info(f"Attempting to execute trade for opportunity: {opportunity.symbol} "
-                    f"| Buy on {opportunity.buy_exchange} | Sell on {opportunity.sell_exchange}")
+        # Positional arguments are only formatted when a sink accepts the record
+        logger.info("Attempting to execute trade for opportunity: {} | Buy on {} | Sell on {}",
+                    opportunity.symbol, opportunity.buy_exchange, opportunity.sell_exchange)
 
         if self.paper_mode:
-            logger.warning(f"[PAPER MODE] Skipping real execution for {opportunity.symbol}.")
+            logger.warning("[PAPER MODE] Skipping real execution for {}.", opportunity.symbol)
             # Log the intended trade for simulation purposes
-            self.order_manager.record_paper_trade(opportunity)
-            return {
-                'success': True,
-                'paper_mode': True,
-                'buy_order': None,
-                'sell_order': None,
-                'message': 'Paper trade recorded'
-            }
+            self.order_manager.record_paper_trade(opportunity, self.max_trade_size_usd / opportunity.buy_price)
+            return ExecutionResult(success=True, paper_mode=True, message='Paper trade recorded')
 
-        buy_exchange = self.exchange_manager.get_exchange(opportunity.buy_exchange)
-        sell_exchange = self.exchange_manager.get_exchange(opportunity.sell_exchange)
-
-        if not buy_exchange or not sell_exchange:
-            logger.error("Could not get exchange instances for trade execution.")
-            return {
-                'success': False,
-                'error': 'Exchange instances not available',
-                'buy_order': None,
-                'sell_order': None
-            }
+        prepared = self.prepare_orders(opportunity)
+        if prepared is None:
+            return ExecutionResult(success=False, error='Orders could not be prepared')
+        return await self.submit_orders(prepared)
 
-        buy_order = None
-        sell_order = None
+    def prepare_orders(self, opportunity: Opportunity) -> Optional[PreparedTrade]:
+        """
+        Resolves the exchanges of both legs and sizes the orders, without placing
+        them. Returns None if the trade cannot be prepared. Discarding the result
+        has no side effects.
+        """
+        buy_exchange = self._exchanges.get(opportunity.buy_exchange)
+        sell_exchange = self._exchanges.get(opportunity.sell_exchange)
+        error_handler = self.exchange_manager.error_handler
+        if (buy_exchange is None or sell_exchange is None
+                or error_handler.is_circuit_open(opportunity.buy_exchange)
+                or error_handler.is_circuit_open(opportunity.sell_exchange)):
+            # Slow path: get_exchange logs why each exchange is unavailable
+            buy_exchange = self.exchange_manager.get_exchange(opportunity.buy_exchange)
+            sell_exchange = self.exchange_manager.get_exchange(opportunity.sell_exchange)
+            if not buy_exchange or not sell_exchange:
+                logger.error("Could not get exchange instances for trade execution.")
+                return None
 
         try:
-            # --- Real Order Execution ---
-            logger.info(f"Placing BUY order: {opportunity.volume} {opportunity.base_currency} on {opportunity.buy_exchange}")
-            buy_order = await buy_exchange.create_limit_buy_order(
-                opportunity.symbol, 'limit', 'buy', opportunity.volume, opportunity.buy_price)
-            self.order_manager.add_order(buy_order)
-            logger.success(f"Successfully placed BUY order on {opportunity.buy_exchange}. Order ID: {buy_order['id']}")
-
-            logger.info(f"Placing SELL order: {opportunity.volume} {opportunity.base_currency} on {opportunity.sell_exchange}")
-            sell_order = await sell_exchange.create_limit_sell_order(
-                opportunity.symbol, 'limit', 'sell', opportunity.volume, opportunity.sell_price)
-            self.order_manager.add_order(sell_order)
-            logger.success(f"Successfully placed SELL order on {opportunity.sell_exchange}. Order ID: {sell_order['id']}")
-
-            if buy_order and sell_order:
-                return {
-                    'success': True,
-                    'buy_order': buy_order,
-                    'sell_order': sell_order,
-                    'message': 'Both orders executed successfully'
-                }
-            
-            # Handle partial execution
-            if buy_order and not sell_order:
-                logger.warning(f"Only BUY order was successful. Attempting to cancel order {buy_order['id']}.")
-                await self._handle_partial_execution(buy_exchange, buy_order, 'buy')
-                return {
-                    'success': False,
-                    'error': 'Partial execution - buy order placed but sell order failed',
-                    'buy_order': buy_order,
-                    'sell_order': None
-                }
-            
-            if sell_order and not buy_order:
-                logger.warning(f"Only SELL order was successful. Attempting to cancel order {sell_order['id']}.")
-                await self._handle_partial_execution(sell_exchange, sell_order, 'sell')
-                return {
-                    'success': False,
-                    'error': 'Partial execution - sell order placed but buy order failed',
-                    'buy_order': None,
-                    'sell_order': sell_order
-                }
-
-            return {
-                'success': False,
-                'error': 'Both orders failed',
-                'buy_order': None,
-                'sell_order': None
-            }
+            # Both legs trade the same base amount, worth max_trade_size at the buy price,
+            # rounded to what both markets accept
+            amount = self.max_trade_size_usd / opportunity.buy_price
+            amount = float(buy_exchange.amount_to_precision(opportunity.symbol, amount))
+            amount = float(sell_exchange.amount_to_precision(opportunity.symbol, amount))
+            buy_price = float(buy_exchange.price_to_precision(opportunity.symbol, opportunity.buy_price))
+            sell_price = float(sell_exchange.price_to_precision(opportunity.symbol, opportunity.sell_price))
         except Exception as e:
-            logger.error(f"Error executing trade for {opportunity.symbol}: {e}")
-            
-            # Attempt to clean up any successful orders
-            if buy_order:
-                await self._handle_partial_execution(buy_exchange, buy_order, 'buy')
-            if sell_order:
-                await self._handle_partial_execution(sell_exchange, sell_order, 'sell')
-                
-            return {
-                'success': False,
-                'error': f'Execution failed: {str(e)}',
-                'buy_order': buy_order,
-                'sell_order': sell_order
+            logger.error("Could not prepare orders for {}: {}", opportunity.symbol, e)
+            return None
+
+        if amount <= 0:
+            logger.warning("Order amount for {} rounds to zero, skipping trade.", opportunity.symbol)
+            return None
+
+        return PreparedTrade(opportunity, buy_exchange, sell_exchange, amount, buy_price, sell_price)
+
+    async def submit_orders(self, prepared: PreparedTrade) -> ExecutionResult:
+        """
+        Places the buy and sell orders of a prepared trade, cancelling the placed
+        leg if the other one fails. Returns the execution results.
+        """
+        opportunity = prepared.opportunity
+        buy_exchange = prepared.buy_exchange
+        sell_exchange = prepared.sell_exchange
+
+        symbol, amount = opportunity.symbol, prepared.amount
+        create_buy = buy_exchange.create_limit_buy_order
+        create_sell = sell_exchange.create_limit_sell_order
+
+        # --- Real Order Execution ---
+        # Both legs are sent at once: the time between them is unhedged exposure
+        logger.trace("Placing BUY order: {} {} on {} and SELL order: {} {} on {}",
+                     amount, symbol, opportunity.buy_exchange, amount, symbol, opportunity.sell_exchange)
+        started = time.perf_counter()
+        buy_result, sell_result = await asyncio.gather(
+            create_buy(symbol, amount, prepared.buy_price),
+            create_sell(symbol, amount, prepared.sell_price),
+            return_exceptions=True,
+        )
+
+        buy_order = sell_order = None
+        for side, exchange_name, result in (('BUY', opportunity.buy_exchange, buy_result),
+                                            ('SELL', opportunity.sell_exchange, sell_result)):
+            if isinstance(result, BaseException):
+                logger.error("Failed to place {} order for {} on {}: {}", side, symbol, exchange_name, result)
+                continue
+            if side == 'BUY':
+                buy_order = result
+            else:
+                sell_order = result
+
+        placed = [(name, order) for name, order in ((opportunity.buy_exchange, buy_order),
+                                                    (opportunity.sell_exchange, sell_order)) if order]
+        tracked: Dict[str, Order] = {}
+        if placed:
+            try:
+                tracked = {order.id: order for order in self.order_manager.add_orders(placed)}
+            except Exception as e:
+                # The orders are live either way; only their tracking failed
+                logger.error("Could not track orders {}: {}", [order['id'] for _, order in placed], e)
+
+        if buy_order and sell_order:
+            # One record per trade; loguru also adds keyword arguments to the record's `extra`
+            trade = {
+                'symbol': symbol,
+                'amount': amount,
+                'buy_exchange': opportunity.buy_exchange,
+                'sell_exchange': opportunity.sell_exchange,
+                'buy_order_id': buy_order['id'],
+                'sell_order_id': sell_order['id'],
+                'ms': (time.perf_counter() - started) * 1000,
             }
+            logger.success(
+                "Trade complete: {amount} {symbol} bought on {buy_exchange} (order {buy_order_id}) "
+                "and sold on {sell_exchange} (order {sell_order_id}) in {ms:.1f}ms", **trade)
+            return ExecutionResult(success=True, buy_order=tracked.get(buy_order['id']),
+                                   sell_order=tracked.get(sell_order['id']),
+                                   message='Both orders executed successfully')
+
+        # Handle partial execution
+        if buy_order and not sell_order:
+            logger.warning("Only BUY order was successful. Attempting to cancel order {}.", buy_order['id'])
+            await self._handle_partial_execution(buy_exchange, buy_order, 'buy')
+            return ExecutionResult(success=False, buy_order=tracked.get(buy_order['id']),
+                                   error=f'Partial execution - buy order placed but sell order failed: {sell_result}')
+
+        if sell_order and not buy_order:
+            logger.warning("Only SELL order was successful. Attempting to cancel order {}.", sell_order['id'])
+            await self._handle_partial_execution(sell_exchange, sell_order, 'sell')
+            return ExecutionResult(success=False, sell_order=tracked.get(sell_order['id']),
+                                   error=f'Partial execution - sell order placed but buy order failed: {buy_result}')
+
+        return ExecutionResult(success=False, error=f'Both orders failed: {buy_result}; {sell_result}')
 
     async def _handle_partial_execution(self, exchange, order: dict, side: str):
         """
@@ -144,114 +204,125 @@ class TradeExecutor:
         This prevents leaving unhedged positions.
         """
         try:
-            logger.warning(f"Attempting to cancel {side} order {order['id']} due to partial execution")
+            logger.warning("Attempting to cancel {} order {} due to partial execution", side, order['id'])
             cancelled_order = await exchange.cancel_order(order['id'], order['symbol'])
             
             if cancelled_order['status'] == 'canceled':
-                logger.success(f"Successfully cancelled {side} order {order['id']}")
-                self.order_manager.update_order_status(order['id'], 'canceled')
+                logger.success("Successfully cancelled {} order {}", side, order['id'])
+                self.order_manager.set_order_status(order['id'], 'canceled')
             else:
-                logger.warning(f"Order {order['id']} could not be cancelled - it may have been filled. Status: {cancelled_order['status']}")
+                logger.warning("Order {} could not be cancelled - it may have been filled. Status: {}",
+                               order['id'], cancelled_order['status'])
                 # If the order was filled, we need to handle the position
                 if cancelled_order['status'] == 'closed':
-                    logger.critical(f"Order {order['id']} was filled! Manual intervention required to hedge position.")
+                    logger.critical("Order {} was filled! Manual intervention required to hedge position.", order['id'])
                     
         except Exception as e:
-            logger.error(f"Failed to cancel {side} order {order['id']}: {e}")
-            logger.critical(f"Manual intervention required for order {order['id']}")
+            logger.error("Failed to cancel {} order {}: {}", side, order['id'], e)
+            logger.critical("Manual intervention required for order {}", order['id'])
             
     def _create_mock_order(self, opportunity: Opportunity, side: str, amount: float) -> Order:
         """Creates a mock order for paper trading."""
+        # One integer clock read for both the id and the timestamp
+        ts_ms = time.time_ns() // 1_000_000
         return Order(
-            id=f"paper-{side}-{int(time.time() * 1000)}",
+            id=f"paper-{side}-{ts_ms}",
             symbol=opportunity.symbol,
             exchange=opportunity.buy_exchange if side == 'buy' else opportunity.sell_exchange,
             side=side,
             type='limit',
             price=opportunity.buy_price if side == 'buy' else opportunity.sell_price,
             amount=amount,
-            status='closed', # Assume filled instantly for paper trading
-            timestamp=int(time.time() * 1000)
+            status=OrderStatus.CLOSED, # Assume filled instantly for paper trading
+            timestamp=ts_ms / 1000  # Order timestamps are in seconds, see Order.from_ccxt_order
         )
 
     async def place_order(self, exchange_name: str, symbol: str, side: str, amount: float, price: float) -> dict:
         """A wrapper for placing an order with error handling."""
         exchange = self.exchange_manager.get_exchange(exchange_name)
         if not exchange:
-            logger.error(f"Cannot place order: Exchange '{exchange_name}' is not available.")
+            logger.error("Cannot place order: Exchange '{}' is not available.", exchange_name)
             return None
         
         try:
             # Note: ccxt unified method is create_limit_buy_order, etc.
             # but create_order is the most general.
             order = await exchange.create_order(symbol, 'limit', side, amount, price)
-            logger.info(f"Placed {side} order on {exchange_name} for {amount} {symbol} @ {price}")
-            self.order_manager.record_order(order)
+            logger.info("Placed {} order on {} for {} {} @ {}", side, exchange_name, amount, symbol, price)
+            self.order_manager.add_order(order, exchange_name)
             return order
         except Exception as e:
-            logger.error(f"Failed to place {side} order on {exchange_name}: {e}")
-            # TODO: Implement order cancellation logic if one leg of the trade fails
+            logger.error("Failed to place {} order on {}: {}", side, exchange_name, e)
             return None 
 
     async def liquidate_all_positions(self):
         """
         Connects to all exchanges, cancels all open orders, and liquidates all assets
-        to the primary quote currency (e.g., USDT).
+        to the primary quote currency (e.g., USDT). The exchanges are processed
+        concurrently, so one slow exchange does not delay the others.
         """
         logger.warning("!!! INITIATING EMERGENCY LIQUIDATION !!!")
-        quote_currencies = ['USDT', 'USD', 'BUSD', 'USDC'] # Currencies to keep
-        
-        for exchange_name, exchange in self.exchange_manager.exchanges.items():
-            try:
-                logger.info(f"--- Processing liquidation for {exchange_name} ---")
-                
-                # 1. Cancel all open orders for this exchange
-                logger.info(f"Cancelling all open orders on {exchange_name}...")
-                # In a real scenario, a more robust implementation would fetch open orders 
-                # and cancel them one by one, as `cancel_all_orders` is not universally supported.
-                if 'cancelAllOrders' in exchange.has and exchange.has['cancelAllOrders']:
-                    await exchange.cancel_all_orders()
-                else:
-                    logger.warning(f"Exchange {exchange_name} does not support cancel_all_orders. Manual cancellation may be needed.")
-
-                # 2. Fetch current balances
-                balance = await exchange.fetch_balance()
-                
-                # 3. Find assets to liquidate
-                assets_to_liquidate = []
-                for currency, amount in balance['total'].items():
-                    # Only consider assets with a meaningful amount
-                    if amount > 0 and currency not in quote_currencies:
-                        assets_to_liquidate.append((currency, amount))
-                
-                if not assets_to_liquidate:
-                    logger.info(f"No assets to liquidate on {exchange_name}.")
+        await asyncio.gather(*(self._liquidate_exchange(exchange_name, exchange)
+                               for exchange_name, exchange in self.exchange_manager.exchanges.items()))
+        logger.critical("!!! EMERGENCY LIQUIDATION COMPLETE !!!")
+
+    async def _liquidate_exchange(self, exchange_name: str, exchange):
+        """
+        Cancels the open orders on one exchange and sells its non-quote assets,
+        placing all market sell orders at once.
+        """
+        liquidation_symbols = self.exchange_manager.liquidation_symbols.get(exchange_name, {})
+
+        try:
+            logger.info("--- Processing liquidation for {} ---", exchange_name)
+
+            # 1. Cancel all open orders for this exchange
+            logger.info("Cancelling all open orders on {}...", exchange_name)
+            # In a real scenario, a more robust implementation would fetch open orders 
+            # and cancel them one by one, as `cancel_all_orders` is not universally supported.
+            capabilities = self.exchange_manager.capabilities.get(exchange_name)
+            if capabilities is not None and capabilities.cancel_all_orders:
+                await exchange.cancel_all_orders()
+            else:
+                logger.warning("Exchange {} does not support cancel_all_orders. Manual cancellation may be needed.", exchange_name)
+
+            # 2. Fetch current balances
+            balance = await exchange.fetch_balance()
+
+            # 3. Find assets to liquidate
+            assets_to_liquidate = []
+            for currency, amount in balance['total'].items():
+                # Only consider assets with a meaningful amount
+                if amount > 0 and currency not in LIQUIDATION_QUOTE_SET:
+                    assets_to_liquidate.append((currency, amount))
+
+            if not assets_to_liquidate:
+                logger.info("No assets to liquidate on {}.", exchange_name)
+                return
+
+            logger.warning("Found assets to liquidate on {}: {}", exchange_name, assets_to_liquidate)
+
+            # 4. Liquidate each asset
+            sells = []
+            for currency, amount in assets_to_liquidate:
+                # The market to sell this currency for a quote currency, indexed at startup
+                market_symbol = liquidation_symbols.get(currency)
+                if not market_symbol:
+                    logger.error("Could not find a market to sell {} on {}. Manual intervention required.", currency, exchange_name)
                     continue
-                
-                logger.warning(f"Found assets to liquidate on {exchange_name}: {assets_to_liquidate}")
-
-                # 4. Liquidate each asset
-                for currency, amount in assets_to_liquidate:
-                    # Find a market to sell this currency for a quote currency
-                    market_symbol = None
-                    for quote in quote_currencies:
-                        symbol = f"{currency}/{quote}"
-                        if symbol in exchange.markets:
-                            market_symbol = symbol
-                            break
-                    
-                    if not market_symbol:
-                        logger.error(f"Could not find a market to sell {currency} on {exchange_name}. Manual intervention required.")
-                        continue
-                        
-                    # Place a market sell order
-                    logger.warning(f"Placing MARKET SELL order for {amount} {currency} on {exchange_name} via {market_symbol}")
-                    if not self.paper_mode:
-                        await exchange.create_market_sell_order(market_symbol, amount)
-                    else:
-                        logger.info(f"[PAPER MODE] Skipping MARKET SELL for {amount} {currency} on {exchange_name}")
 
-            except Exception as e:
-                logger.critical(f"An error occurred during liquidation on {exchange_name}: {e}. Manual intervention may be required!")
+                # Place a market sell order
+                logger.warning("Placing MARKET SELL order for {} {} on {} via {}", amount, currency, exchange_name, market_symbol)
+                if not self.paper_mode:
+                    sells.append((currency, exchange.create_market_sell_order(market_symbol, amount)))
+                else:
+                    logger.info("[PAPER MODE] Skipping MARKET SELL for {} {} on {}", amount, currency, exchange_name)
+
+            results = await asyncio.gather(*(sell for _, sell in sells), return_exceptions=True)
+            for (currency, _), result in zip(sells, results):
+                if isinstance(result, Exception):
+                    logger.critical("Failed to sell {} on {}: {}. Manual intervention required!", currency, exchange_name, result)
 
-        logger.critical("!!! EMERGENCY LIQUIDATION COMPLETE !!!") 
\ No newline at end of file
+        except Exception as e:
+            logger.critical("An error occurred during liquidation on {}: {}. Manual intervention may be required!",
+                            exchange_name, e)
@@ -1,39 +1,18 @@
-from typing import Dict, Optional
-from loguru import logger
 import asyncio
 import time
-from enum import Enum
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from loguru import logger
 
 from arbitrage_bot.exchange.manager import ExchangeManager
 from arbitrage_bot.models.order import Order, OrderStatus
 
-class OrderStatus(Enum):
-    """
-    Represents the status of an order.
-    """
-    OPEN = 'open'
-    PARTIALLY_FILLED = 'partially_filled'
-    FILLED = 'filled'
-    CANCELED = 'canceled'
-    FAILED = 'failed'
-
-@dataclass
-class Order:
-    """
-    Represents a single order placed on an exchange.
-    """
-    id: str
-    exchange_name: str
-    symbol: str
-    side: str  # 'buy' or 'sell'
-    amount: float
-    price: Optional[float] = None
-    status: OrderStatus = OrderStatus.OPEN
-    filled: float = 0.0
-    average: Optional[float] = None
-    timestamp: float = field(default_factory=time.time)
-    last_update: float = field(default_factory=time.time)
+# Statuses of orders that are no longer working on their exchange
+_FINAL_STATUSES = frozenset((OrderStatus.CLOSED, OrderStatus.FILLED, OrderStatus.CANCELED, OrderStatus.FAILED))
+# How many orders in a final status are kept; older ones are forgotten first
+CLOSED_ORDER_HISTORY = 10_000
+# Status strings for log records, without going through the enum's `value` property
+_STATUS_STR = {status: status.value for status in OrderStatus}
 
 class OrderManager:
     """
@@ -41,9 +20,31 @@ class OrderManager:
     """
     def __init__(self, exchange_manager: ExchangeManager):
         self.exchange_manager = exchange_manager
-        self.orders: Dict[str, Order] = {}
+        # Working orders and orders in a final status are kept apart, so the risk
+        # checks count open orders without scanning the order history
+        self._open_orders: Dict[str, Order] = {}
+        self._closed_orders: OrderedDict[str, Order] = OrderedDict()
+
+    def _track(self, order: Order):
+        """Files an order under its status, replacing any earlier record of it."""
+        if order.status in _FINAL_STATUSES:
+            self._open_orders.pop(order.id, None)
+            self._closed_orders[order.id] = order
+            # Bounded, so a long-running bot does not accumulate every order it placed
+            if len(self._closed_orders) > CLOSED_ORDER_HISTORY:
+                self._closed_orders.popitem(last=False)
+        else:
+            self._closed_orders.pop(order.id, None)
+            self._open_orders[order.id] = order
+
+    @staticmethod
+    def _log_transition(order: Order, old_status: OrderStatus):
+        """Logs a status change as one record, with its fields bound for structured sinks."""
+        old, new = _STATUS_STR[old_status], _STATUS_STR[order.status]
+        logger.bind(event='order_update', order_id=order.id, exchange=order.exchange, old=old, new=new).info(
+            "Order {} on {} status changed: {} -> {}", order.id, order.exchange, old, new)
 
-    async def update_order_status(self, order_id: str) -> Optional[Order]:
+    async def refresh_order_status(self, order_id: str) -> Optional[Order]:
         """
         Fetches the latest status of a single order from the exchange
         and updates the local record.
@@ -54,64 +55,101 @@ class OrderManager:
         Returns:
             The updated Order object, or None if the order is not found or an error occurs.
         """
-        order = self.orders.get(order_id)
+        order = self.get_order(order_id)
         if not order:
             logger.error(f"Cannot update status for unknown order ID: {order_id}")
             return None
         
-        exchange = self.exchange_manager.get_exchange(order.exchange_name)
+        exchange = self.exchange_manager.get_exchange(order.exchange)
         if not exchange:
-            logger.error(f"Cannot get exchange instance '{order.exchange_name}' to update order {order_id}.")
+            logger.error(f"Cannot get exchange instance '{order.exchange}' to update order {order_id}.")
             return None
 
         try:
-            logger.debug(f"Fetching status for order {order_id} on {order.exchange_name}...")
             fetched_order_data = await exchange.fetch_order(order_id, order.symbol)
-            updated_order = Order.from_ccxt_order(fetched_order_data)
+            updated_order = Order.from_ccxt_order(fetched_order_data, order.exchange)
 
+            # Updated in place, so holders of the order (e.g. an ExecutionResult) see it too.
+            # Fills are copied even if the status is unchanged, e.g. a growing partial fill.
+            order.filled, order.cost, order.fee = updated_order.filled, updated_order.cost, updated_order.fee
             if order.status != updated_order.status:
-                logger.success(f"Order {order_id} status changed: {order.status.value} -> {updated_order.status.value}")
-                self.orders[order_id] = updated_order
-            else:
-                logger.info(f"Order {order_id} status remains '{order.status.value}'.")
-            
-            return self.orders[order_id]
+                old_status = order.status
+                order.status = updated_order.status
+                self._track(order)
+                self._log_transition(order, old_status)
+            return order
 
         except Exception as e:
-            logger.error(f"Failed to fetch status for order {order_id} on {order.exchange_name}: {e}")
+            logger.error(f"Failed to fetch status for order {order_id} on {order.exchange}: {e}")
             return None
 
-    def add_order(self, order_data: dict):
-        if order_data['id'] in self.orders:
+    async def refresh_open_orders(self) -> List[Order]:
+        """
+        Fetches the latest status of every open order, all orders concurrently, so
+        refreshing N orders takes one round trip rather than N. ccxt has no unified
+        call to fetch orders by ID, hence one fetch_order per order; each exchange's
+        rate limiter still spaces out the requests sent to it.
+
+        Returns:
+            The refreshed orders; orders whose fetch failed are left out.
+        """
+        order_ids = list(self._open_orders)
+        if not order_ids:
+            return []
+        # refresh_order_status logs and swallows its own errors, so one failed
+        # fetch does not affect the others
+        refreshed = await asyncio.gather(*(self.refresh_order_status(order_id) for order_id in order_ids))
+        return [order for order in refreshed if order is not None]
+
+    def add_order(self, order_data: dict, exchange_name: Optional[str] = None):
+        if self.get_order(order_data['id']):
             logger.warning(f"Order {order_data['id']} already being managed.")
             return
             
-        order = Order.from_ccxt_order(order_data)
-        self.orders[order.id] = order
-        logger.info(f"Now managing order {order.id} on {order.exchange_name} ({order.status.value}).")
+        order = Order.from_ccxt_order(order_data, exchange_name)
+        self._track(order)
+        logger.info(f"Now managing order {order.id} on {order.exchange} ({order.status.value}).")
+
+    def add_orders(self, orders_data: Iterable[Tuple[str, dict]]) -> List[Order]:
+        """
+        Starts managing several (exchange name, ccxt order) pairs at once, e.g. both
+        legs of a trade, with a single log record. Returns the orders that were added.
+        """
+        added = []
+        # Orders without an exchange timestamp, e.g. both legs of a trade, share one clock reading
+        now = time.time()
+        for exchange_name, order_data in orders_data:
+            if self.get_order(order_data['id']):
+                logger.warning(f"Order {order_data['id']} already being managed.")
+                continue
+            order = Order.from_ccxt_order(order_data, exchange_name, now)
+            self._track(order)
+            added.append(order)
+        if added:
+            logger.info("Now managing orders {}.", ", ".join(
+                f"{order.id} on {order.exchange} ({order.status.value})" for order in added))
+        return added
 
     def get_order(self, order_id: str) -> Optional[Order]:
-        return self.orders.get(order_id)
+        return self._open_orders.get(order_id) or self._closed_orders.get(order_id)
     
     def get_open_order_count(self) -> int:
         """Returns the number of open (non-closed) orders."""
-        open_count = 0
-        for order in self.orders.values():
-            if order.status not in [OrderStatus.FILLED, OrderStatus.CANCELED, OrderStatus.FAILED]:
-                open_count += 1
-        return open_count
+        return len(self._open_orders)
     
-    def record_paper_trade(self, opportunity):
-        """Records a paper trade for simulation purposes."""
+    def record_paper_trade(self, opportunity, amount: float):
+        """Records a paper trade of the given base amount for simulation purposes."""
         logger.info(f"[PAPER TRADE] Would execute {opportunity.symbol}: "
-                   f"Buy {opportunity.volume} on {opportunity.buy_exchange} @ {opportunity.buy_price}, "
-                   f"Sell {opportunity.volume} on {opportunity.sell_exchange} @ {opportunity.sell_price}")
+                   f"Buy {amount} on {opportunity.buy_exchange} @ {opportunity.buy_price}, "
+                   f"Sell {amount} on {opportunity.sell_exchange} @ {opportunity.sell_price}")
     
-    def update_order_status(self, order_id: str, status: str):
+    def set_order_status(self, order_id: str, status: str):
         """Updates an order's status manually."""
-        if order_id in self.orders:
-            old_status = self.orders[order_id].status
-            self.orders[order_id].status = OrderStatus(status)
-            logger.info(f"Order {order_id} status updated: {old_status.value} -> {status}")
+        order = self.get_order(order_id)
+        if order:
+            old_status = order.status
+            order.status = OrderStatus(status)
+            self._track(order)
+            self._log_transition(order, old_status)
         else:
             logger.warning(f"Cannot update status for unknown order ID: {order_id}") 
\ No newline at end of file
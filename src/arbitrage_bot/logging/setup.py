@@ -1,21 +1,35 @@
+import os
 import sys
 from pathlib import Path
 from loguru import logger
 
-from arbitrage_bot.config.settings import config
+from arbitrage_bot.config.settings import get_config
+
+# Severity numbers of the built-in levels, resolved once
+_LEVEL_NO = {name: logger.level(name).no for name in ("TRACE", "DEBUG", "INFO", "SUCCESS")}
+
+def is_level_enabled(level: str) -> bool:
+    """
+    Returns True if at least one sink currently accepts records of the given level.
+    Hot paths use this to skip building log messages that would be discarded.
+    """
+    return logger._core.min_level <= _LEVEL_NO[level]
 
 def setup_logging():
     """
     Sets up the loguru logging system for the application.
     - Removes default handlers.
     - Adds a colored console logger.
-    - Adds a rotating file logger for all levels.
+    - Adds a rotating file logger, for INFO and above (DEBUG if the BOT_DEBUG
+      environment variable is set).
+    - Adds a rotating JSON file logger if `logging.json` is enabled.
     - Catches all uncaught exceptions.
     """
     # 1. Remove the default handler to have full control
     logger.remove()
 
     # 2. Add a console logger with colors and a specific format
+    config = get_config()
     log_level = config.logging.get('level', 'INFO').upper()
     logger.add(
         sys.stderr,
@@ -27,20 +41,32 @@ def setup_logging():
     # 3. Add a rotating file logger
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True) # Create the logs directory if it doesn't exist
-    
-    file_log_path = log_dir / "bot_{time:YYYY-MM-DD}.log"
-    
+
+    # DEBUG records (with exception variable values) lower the level every hot-path
+    # log call is checked against, so the file only keeps them on request
+    debug = bool(os.environ.get("BOT_DEBUG"))
     logger.add(
-        file_log_path,
-        level="DEBUG",  # Log everything to the file
+        log_dir / "bot_{time:YYYY-MM-DD}.log",
+        level="DEBUG" if debug else "INFO",
         rotation="00:00",  # New file at midnight
         retention="7 days",  # Keep logs for 7 days
         enqueue=True,  # Make logging non-blocking
-        backtrace=True, # Show full stack trace for exceptions
-        diagnose=True, # Add exception variable values
+        backtrace=debug, # Show full stack trace for exceptions
+        diagnose=debug, # Add exception variable values
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
     )
 
+    # Optional JSON lines copy for log pipelines, including the fields bound to records
+    if config.logging.get('json', False):
+        logger.add(
+            log_dir / "bot_{time:YYYY-MM-DD}.json",
+            level="INFO",
+            rotation="00:00",
+            retention="7 days",
+            enqueue=True,
+            serialize=True,
+        )
+
     # 4. Catch all uncaught exceptions
     logger.catch(onerror=lambda _: sys.exit(1))
 
@@ -1,11 +1,12 @@
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Opportunity:
     """
-    Represents a potential arbitrage opportunity.
+    Represents a potential arbitrage opportunity. It is not changed after the
+    scanner creates it.
     """
     symbol: str
     buy_exchange: str
@@ -14,4 +15,16 @@ class Opportunity:
     sell_price: float
     gross_profit_pct: float
     net_profit_pct: float
-    timestamp: float = time.time() 
\ No newline at end of file
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass(slots=True)
+class Quote:
+    """
+    The Level 1 data (best bid and ask) of one order book stream. A missing side
+    is stored as -inf (bid) or +inf (ask). `seq` is incremented on every change,
+    so readers can tell whether the quote moved since they last looked.
+    """
+    bid: float = float('-inf')
+    ask: float = float('inf')
+    seq: int = 0
@@ -1,6 +1,7 @@
 from enum import Enum
 from dataclasses import dataclass, field
 import time
+from typing import Optional
 
 class OrderStatus(Enum):
     OPEN = 'open'
@@ -8,8 +9,14 @@ class OrderStatus(Enum):
     CANCELED = 'canceled'
     FILLED = 'filled' # Custom status for fully filled
     PARTIALLY_FILLED = 'partially_filled' # Custom for partially filled but still open
+    FAILED = 'failed' # Custom for orders that were rejected or could not be placed
 
-@dataclass
+# ccxt status strings to statuses; a dict lookup instead of OrderStatus(value),
+# which raises (and has to be caught) for unknown statuses
+_STATUS_BY_VALUE = {status.value: status for status in OrderStatus}
+
+# Not frozen: OrderManager.set_order_status updates the status in place
+@dataclass(slots=True)
 class Order:
     id: str
     exchange: str
@@ -25,34 +32,36 @@ class Order:
     fee: dict = field(default_factory=dict)
 
     @classmethod
-    def from_ccxt_order(cls, ccxt_order: dict) -> 'Order':
-        """Creates an Order object from a ccxt order dictionary."""
+    def from_ccxt_order(cls, ccxt_order: dict, exchange: Optional[str] = None,
+                        now: Optional[float] = None) -> 'Order':
+        """
+        Creates an Order object from a ccxt order dictionary. ccxt orders do not
+        name their exchange, so it can be given explicitly. Orders without a
+        timestamp get `now`, or the current time if it is not given, so orders
+        created together can share one clock reading.
+        """
         
         # Normalize status
         status_str = ccxt_order.get('status')
-        if status_str == 'closed' and ccxt_order.get('filled', 0.0) == ccxt_order.get('amount', -1.0):
+        filled = ccxt_order.get('filled', 0.0)
+        if status_str == 'closed' and filled == ccxt_order.get('amount', -1.0):
             status = OrderStatus.FILLED
-        elif status_str == 'open' and ccxt_order.get('filled', 0.0) > 0:
+        elif status_str == 'open' and filled > 0:
             status = OrderStatus.PARTIALLY_FILLED
-        elif status_str:
-            try:
-                status = OrderStatus(status_str)
-            except ValueError:
-                status = OrderStatus.OPEN # Default for unknown statuses
         else:
-            status = OrderStatus.OPEN
+            status = _STATUS_BY_VALUE.get(status_str, OrderStatus.OPEN) # OPEN for missing or unknown statuses
 
         return cls(
             id=ccxt_order['id'],
-            exchange=ccxt_order['exchange'],
+            exchange=exchange or ccxt_order.get('exchange'),
             symbol=ccxt_order['symbol'],
             side=ccxt_order['side'],
             type=ccxt_order['type'],
             amount=ccxt_order.get('amount'),
             price=ccxt_order.get('price') or ccxt_order.get('average'),
             status=status,
-            timestamp=ccxt_order.get('timestamp') / 1000 if ccxt_order.get('timestamp') else time.time(), # ms to s
+            timestamp=ts_ms / 1000 if (ts_ms := ccxt_order.get('timestamp')) else (now or time.time()), # ms to s
             cost=ccxt_order.get('cost', 0.0),
-            filled=ccxt_order.get('filled', 0.0),
+            filled=filled,
             fee=ccxt_order.get('fee')
         ) 
\ No newline at end of file
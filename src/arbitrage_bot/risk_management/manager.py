@@ -1,12 +1,14 @@
 from __future__ import annotations
+import asyncio
+import os
 from typing import TYPE_CHECKING
 from loguru import logger
 
-from arbitrage_bot.config.settings import config
+from arbitrage_bot.config.settings import get_config
 from arbitrage_bot.model import Opportunity
 from arbitrage_bot.execution.order_manager import OrderManager
 from arbitrage_bot.models.order import Order
-import json
+import orjson
 from pathlib import Path
 from typing import List
 
@@ -21,14 +23,19 @@ class RiskManager:
         self.order_manager = order_manager
         
         # Load configuration from config
-        self.max_open_trades = config.risk_management.get('max_open_trades', 5)
-        self.emergency_stop_loss_usd = config.risk_management.get('emergency_stop_loss_pct', 10.0) * 10  # Convert percentage to USD
+        risk_params = get_config().risk_params
+        self.max_open_trades = risk_params.max_open_trades
+        self.emergency_stop_loss_usd = risk_params.emergency_stop_loss_pct * 10  # Convert percentage to USD
+        # The PnL below which trading stops, negated once instead of on every check
+        self._stop_loss_floor_usd = -self.emergency_stop_loss_usd
         
         # Initialize PnL file path
-        self.pnl_file = Path(config.risk_management.get('pnl_file', 'pnl_report.json'))
+        self.pnl_file = Path(risk_params.pnl_file)
         
         # Load existing PnL or start with 0.0
         self.pnl = self._load_pnl()
+        # Serializes the PnL file writes, which run in worker threads
+        self._save_lock = asyncio.Lock()
         
         # Initialize trading state
         self.trading_enabled = True
@@ -39,15 +46,15 @@ class RiskManager:
         logger.info(f" - PnL file: {self.pnl_file}")
         logger.info(f" - Initial PnL loaded: ${self.pnl:.2f}")
 
-    def update_pnl(self, pnl_change: float):
+    async def update_pnl(self, pnl_change: float):
         """Updates the portfolio's PnL. For simulation and future use."""
         self.pnl += pnl_change
         logger.info(f"PnL updated by ${pnl_change:.2f}. Current PnL: ${self.pnl:.2f}")
-        self._save_pnl()
+        await self._save_pnl()
 
     def check_emergency_stop(self) -> bool:
         """Checks if the emergency stop-loss has been triggered."""
-        if self.pnl < -self.emergency_stop_loss_usd:
+        if self.pnl < self._stop_loss_floor_usd:
              logger.critical(f"EMERGENCY STOP TRIGGERED: Portfolio PnL (${self.pnl:.2f}) has dropped below threshold (-${self.emergency_stop_loss_usd:.2f}).")
              return True
         return False
@@ -57,7 +64,7 @@ class RiskManager:
         Checks if a given trade opportunity is safe to execute based on current risk exposure.
         """
         # 1. Check against emergency stop loss. This is the most critical check.
-        if self.check_emergency_stop():
+        if not self.trading_enabled or self.check_emergency_stop():
              return False
 
         # 2. Check against max open trades
@@ -70,24 +77,30 @@ class RiskManager:
         # - Check exposure to the specific currency
         # - Check recent volatility of the symbol
 
-        logger.info(f"Risk Check PASSED for opportunity: {opportunity.symbol}")
+        logger.info("Risk Check PASSED for opportunity: {}", opportunity.symbol)
         return True
     
-    def update_pnl_from_orders(self, buy_order: Order, sell_order: Order):
+    async def update_pnl_from_orders(self, buy_order: Order, sell_order: Order):
         """
         Updates the total Profit and Loss after a trade is completed.
         This is a simplified PnL calculation.
         """
-        # Assuming fees are in the quote currency (e.g., USD)
-        cost = buy_order.cost + (buy_order.fee['cost'] if buy_order.fee else 0)
-        revenue = sell_order.cost - (sell_order.fee['cost'] if sell_order.fee else 0)
+        # Assuming fees are in the quote currency (e.g., USD). ccxt reports no cost
+        # (None) for orders without fills, which count as 0.
+        cost = (buy_order.cost or 0.0) + self._fee_cost(buy_order)
+        revenue = (sell_order.cost or 0.0) - self._fee_cost(sell_order)
 
         trade_pnl = revenue - cost
         self.pnl += trade_pnl
 
         logger.success(f"PnL Updated. Trade PnL: ${trade_pnl:.2f}, Total PnL: ${self.pnl:.2f}")
-        self._save_pnl()
+        await self._save_pnl()
     
+    @staticmethod
+    def _fee_cost(order: Order) -> float:
+        """The order's fee; 0 when ccxt reports no fee, an empty one or a cost of None."""
+        return (order.fee or {}).get('cost') or 0.0
+
     def emergency_stop(self):
         """
         Disables all further trading and could trigger alerts.
@@ -97,11 +110,20 @@ class RiskManager:
         self.trading_enabled = False
         # In a real system, you might add logic here to cancel all open orders. 
 
-    def _save_pnl(self):
-        """Saves the current PnL to a file."""
+    async def _save_pnl(self):
+        """
+        Saves the current PnL to a file. The write runs in a worker thread, so it
+        does not block the event loop.
+        """
+        async with self._save_lock:
+            await asyncio.to_thread(self._write_pnl, self.pnl)
+
+    def _write_pnl(self, pnl: float):
+        """Writes the PnL file atomically, so a crash never leaves a partial file."""
         try:
-            with open(self.pnl_file, 'w') as f:
-                json.dump({'total_pnl_usd': self.pnl}, f, indent=4)
+            tmp_file = self.pnl_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp_file.write_bytes(orjson.dumps({'total_pnl_usd': pnl}, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_file, self.pnl_file)
         except IOError as e:
             logger.error(f"Failed to save PnL report to {self.pnl_file}: {e}")
 
@@ -110,9 +132,7 @@ class RiskManager:
         if not self.pnl_file.exists():
             return 0.0
         try:
-            with open(self.pnl_file, 'r') as f:
-                data = json.load(f)
-                return data.get('total_pnl_usd', 0.0)
-        except (IOError, json.JSONDecodeError) as e:
+            return orjson.loads(self.pnl_file.read_bytes()).get('total_pnl_usd', 0.0)
+        except (IOError, orjson.JSONDecodeError) as e:
             logger.error(f"Failed to load PnL report from {self.pnl_file}: {e}")
             return 0.0 
\ No newline at end of file
@@ -1,5 +1,18 @@
 import time
-from collections import defaultdict
+from dataclasses import dataclass
+
+# Circuit states, as ints so the per-call checks compare integers, not strings
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+_STATE_NAMES = ("CLOSED", "OPEN", "HALF-OPEN")
+
+
+@dataclass(slots=True)
+class _Circuit:
+    """The state of one component's circuit, found with a single dict lookup."""
+    state: int = CLOSED
+    failure_count: int = 0
+    last_failure_time_ns: int = 0
+
 
 class CircuitBreaker:
     """
@@ -15,24 +28,31 @@ class CircuitBreaker:
         """
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
-        self._state: defaultdict[str, str] = defaultdict(lambda: "CLOSED")
-        self._failure_count: defaultdict[str, int] = defaultdict(int)
-        self._last_failure_time: defaultdict[str, float] = defaultdict(float)
+        # Failure times are time.monotonic_ns() readings, so wall clock adjustments
+        # (e.g. NTP) cannot open or close a circuit early
+        self._recovery_timeout_ns = int(recovery_timeout * 1_000_000_000)
+        # Only components with failures since their last success have an entry;
+        # reads never insert one
+        self._circuits: dict[str, _Circuit] = {}
 
     def is_open(self, component_id: str) -> bool:
         """Checks if the circuit is open for a given component."""
-        if self._state[component_id] == "OPEN":
-            if time.time() - self._last_failure_time[component_id] > self.recovery_timeout:
-                self._state[component_id] = "HALF-OPEN"
+        circuit = self._circuits.get(component_id)
+        if circuit is not None and circuit.state == OPEN:
+            if time.monotonic_ns() - circuit.last_failure_time_ns > self._recovery_timeout_ns:
+                circuit.state = HALF_OPEN
             return True
         return False
 
     def record_failure(self, component_id: str):
         """Records a failure for a component."""
-        self._failure_count[component_id] += 1
-        self._last_failure_time[component_id] = time.time()
-        if self._failure_count[component_id] >= self.failure_threshold:
-            self._state[component_id] = "OPEN"
+        circuit = self._circuits.get(component_id)
+        if circuit is None:
+            circuit = self._circuits[component_id] = _Circuit()
+        circuit.failure_count += 1
+        circuit.last_failure_time_ns = time.monotonic_ns()
+        if circuit.failure_count >= self.failure_threshold:
+            circuit.state = OPEN
 
     def record_success(self, component_id: str):
         """Records a success for a component, resetting its state."""
@@ -40,12 +60,11 @@ class CircuitBreaker:
 
     def reset(self, component_id: str):
         """Resets the state for a given component."""
-        self._state[component_id] = "CLOSED"
-        self._failure_count[component_id] = 0
-        self._last_failure_time[component_id] = 0.0
+        self._circuits.pop(component_id, None)
 
     def get_state(self, component_id: str) -> str:
         """Returns the current state of a component."""
         # Update state to HALF-OPEN if recovery timeout has passed
         self.is_open(component_id)
-        return self._state[component_id] 
\ No newline at end of file
+        circuit = self._circuits.get(component_id)
+        return _STATE_NAMES[circuit.state if circuit is not None else CLOSED]
@@ -19,31 +19,31 @@ class ErrorHandler:
     """
     def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60, backoff_base: int = 2):
         self._circuit_breaker = CircuitBreaker(failure_threshold, recovery_timeout)
-        self._backoff_base = backoff_base
+        # Delay by error count, capped at 60 seconds; counts past the table get its last entry
+        self._backoff_delays = tuple(min(backoff_base ** i, 60) for i in range(32))
         self._error_counts: defaultdict[str, int] = defaultdict(int)
 
     def is_circuit_open(self, component_id: str) -> bool:
         """Checks if the circuit is open for a specific component."""
         is_open = self._circuit_breaker.is_open(component_id)
         if is_open:
-            logger.warning(f"Circuit for {component_id} is OPEN. Temporarily suspending operations.")
+            logger.warning("Circuit for {} is OPEN. Temporarily suspending operations.", component_id)
         return is_open
 
     def record_error(self, component_id: str):
         """Records an error for a component, potentially tripping the circuit breaker."""
-        logger.error(f"Error recorded for component: {component_id}")
+        logger.error("Error recorded for component: {}", component_id)
         self._error_counts[component_id] += 1
         self._circuit_breaker.record_failure(component_id)
 
     def reset_error(self, component_id: str):
         """Resets the error state for a component upon successful operation."""
         if self._error_counts[component_id] > 0:
-            logger.info(f"Component {component_id} has recovered. Resetting error state.")
+            logger.info("Component {} has recovered. Resetting error state.", component_id)
             self._circuit_breaker.record_success(component_id)
             self._error_counts[component_id] = 0
 
-    async def get_backoff_delay(self, component_id: str) -> float:
-        """Calculates the exponential backoff delay for a component."""
-        count = self._error_counts[component_id]
-        delay = self._backoff_base ** count
-        return min(delay, 60)  # Cap delay at 60 seconds 
\ No newline at end of file
+    def get_backoff_delay(self, component_id: str) -> float:
+        """Returns the exponential backoff delay for a component."""
+        delays = self._backoff_delays
+        return delays[min(self._error_counts[component_id], len(delays) - 1)] 
\ No newline at end of file
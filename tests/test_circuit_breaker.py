@@ -0,0 +1,67 @@
+from arbitrage_bot.utils import circuit_breaker as circuit_breaker_module
+from arbitrage_bot.utils.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now_ns = 1_000_000_000
+
+    def monotonic_ns(self):
+        return self.now_ns
+
+    def advance(self, seconds):
+        self.now_ns += int(seconds * 1_000_000_000)
+
+
+def make_breaker(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker_module.time, 'monotonic_ns', clock.monotonic_ns)
+    return CircuitBreaker(**kwargs), clock
+
+
+def test_circuit_opens_half_opens_and_closes(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=3, recovery_timeout=10)
+
+    for _ in range(2):
+        breaker.record_failure('ws')
+    assert not breaker.is_open('ws')
+    assert breaker.get_state('ws') == 'CLOSED'
+
+    breaker.record_failure('ws')
+    assert breaker.is_open('ws')
+    assert breaker.get_state('ws') == 'OPEN'
+
+    clock.advance(5)
+    assert breaker.get_state('ws') == 'OPEN'
+
+    # Past the recovery timeout the caller gets one more refusal, after which trial calls go through
+    clock.advance(6)
+    assert breaker.is_open('ws')
+    assert breaker.get_state('ws') == 'HALF-OPEN'
+    assert not breaker.is_open('ws')
+
+    breaker.record_success('ws')
+    assert breaker.get_state('ws') == 'CLOSED'
+
+
+def test_failure_while_half_open_reopens(monkeypatch):
+    breaker, clock = make_breaker(monkeypatch, failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure('ws')
+    clock.advance(11)
+    assert breaker.get_state('ws') == 'HALF-OPEN'
+
+    breaker.record_failure('ws')
+    assert breaker.get_state('ws') == 'OPEN'
+
+
+def test_components_are_independent_and_reads_insert_nothing(monkeypatch):
+    breaker, _ = make_breaker(monkeypatch, failure_threshold=1)
+    breaker.record_failure('a')
+
+    assert breaker.is_open('a')
+    assert not breaker.is_open('b')
+    assert breaker.get_state('b') == 'CLOSED'
+    assert list(breaker._circuits) == ['a']
+
+    breaker.reset('a')
+    assert not breaker._circuits
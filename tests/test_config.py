@@ -0,0 +1,22 @@
+from arbitrage_bot.config.settings import Config
+
+
+def test_exchange_symbols_are_interned_across_exchanges(tmp_path):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text(
+        "exchanges:\n"
+        "  binance:\n"
+        "    enabled: true\n"
+        "    symbols: ['BTC/USDT', 'ETH/USDT']\n"
+        "  gateio:\n"
+        "    enabled: true\n"
+        "    symbols: ['ETH/USDT', 'BTC/USDT']\n"
+    )
+
+    config = Config(str(config_file))
+
+    binance = config.exchange_params['binance'].symbols
+    gateio = config.exchange_params['gateio'].symbols
+    assert binance[0] is gateio[1]
+    assert binance[1] is gateio[0]
+    assert config.exchanges.binance.symbols[0] is binance[0]
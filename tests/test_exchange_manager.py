@@ -0,0 +1,30 @@
+import os
+import time
+
+from arbitrage_bot.exchange.manager import ExchangeManager
+
+
+def test_markets_cache_round_trip(tmp_path):
+    path = tmp_path / 'markets' / 'binance.json'
+    entry = {'id': 'binance', 'markets': {'BTC/USDT': {'taker': 0.001}}, 'currencies': {}}
+
+    assert ExchangeManager._read_markets_cache(path, 3600) is None
+    ExchangeManager._write_markets_cache(path, entry)
+    assert ExchangeManager._read_markets_cache(path, 3600) == entry
+    assert [p.name for p in path.parent.iterdir()] == ['binance.json']
+
+
+def test_markets_cache_expires_after_ttl(tmp_path):
+    path = tmp_path / 'binance.json'
+    ExchangeManager._write_markets_cache(path, {'id': 'binance', 'markets': {}})
+    an_hour_ago = time.time() - 3600
+    os.utime(path, (an_hour_ago, an_hour_ago))
+
+    assert ExchangeManager._read_markets_cache(path, 7200) is not None
+    assert ExchangeManager._read_markets_cache(path, 1800) is None
+
+
+def test_unreadable_markets_cache_is_ignored(tmp_path):
+    path = tmp_path / 'binance.json'
+    path.write_bytes(b'{not json')
+    assert ExchangeManager._read_markets_cache(path, 3600) is None
@@ -0,0 +1,78 @@
+import asyncio
+import types
+
+from arbitrage_bot.config.settings import ArbitrageParams, RiskParams
+from arbitrage_bot.execution import executor as executor_module
+from arbitrage_bot.execution.executor import PreparedTrade, TradeExecutor
+from arbitrage_bot.execution.order_manager import OrderManager
+from arbitrage_bot.model import Opportunity
+from arbitrage_bot.models.order import Order
+from arbitrage_bot.risk_management import manager as risk_module
+from arbitrage_bot.risk_management.manager import RiskManager
+
+
+class FakeExchange:
+    """Answers order placements with ccxt-shaped order dicts, filled at the limit price."""
+
+    def __init__(self, order_id: str, fee_cost):
+        self.order_id = order_id
+        self.fee_cost = fee_cost
+
+    def _order(self, side, symbol, amount, price):
+        return {
+            'id': self.order_id, 'symbol': symbol, 'side': side, 'type': 'limit',
+            'status': 'closed', 'amount': amount, 'filled': amount, 'price': price,
+            'cost': amount * price, 'timestamp': 1700000000000,
+            'fee': {'cost': self.fee_cost, 'currency': 'USDT'},
+        }
+
+    async def create_limit_buy_order(self, symbol, amount, price):
+        return self._order('buy', symbol, amount, price)
+
+    async def create_limit_sell_order(self, symbol, amount, price):
+        return self._order('sell', symbol, amount, price)
+
+
+def make_components(monkeypatch, tmp_path):
+    config = types.SimpleNamespace(
+        arbitrage_params=ArbitrageParams(max_trade_size=100.0),
+        risk_params=RiskParams(pnl_file=str(tmp_path / 'pnl.json')),
+    )
+    monkeypatch.setattr(executor_module, 'get_config', lambda: config)
+    monkeypatch.setattr(risk_module, 'get_config', lambda: config)
+    exchange_manager = types.SimpleNamespace(exchanges={}, error_handler=None)
+    order_manager = OrderManager(exchange_manager)
+    return TradeExecutor(exchange_manager, order_manager), RiskManager(order_manager)
+
+
+def test_submitted_orders_update_pnl(monkeypatch, tmp_path):
+    executor, risk = make_components(monkeypatch, tmp_path)
+    opportunity = Opportunity('BTC/USDT', 'buyex', 'sellex', 100.0, 101.0, 1.0, 0.8)
+    prepared = PreparedTrade(opportunity, FakeExchange('b1', 0.1), FakeExchange('s1', None),
+                             1.0, 100.0, 101.0)
+
+    async def trade():
+        result = await executor.submit_orders(prepared)
+        assert result.success
+        assert isinstance(result.buy_order, Order) and isinstance(result.sell_order, Order)
+        await risk.update_pnl_from_orders(result.buy_order, result.sell_order)
+
+    asyncio.run(trade())
+
+    # Sold for 101, bought for 100 plus a 0.1 fee; the sell leg's fee cost is None
+    assert abs(risk.pnl - 0.9) < 1e-9
+    assert (tmp_path / 'pnl.json').exists()
+
+
+def test_pnl_counts_unfilled_orders_as_zero(monkeypatch, tmp_path):
+    _, risk = make_components(monkeypatch, tmp_path)
+    unfilled = {
+        'id': 'b2', 'symbol': 'BTC/USDT', 'side': 'buy', 'type': 'limit', 'status': 'open',
+        'amount': 1.0, 'filled': 0.0, 'price': 100.0, 'cost': None, 'timestamp': None, 'fee': None,
+    }
+    buy_order = Order.from_ccxt_order(unfilled, 'buyex')
+    sell_order = Order.from_ccxt_order({**unfilled, 'id': 's2', 'side': 'sell', 'fee': {'cost': None}}, 'sellex')
+
+    asyncio.run(risk.update_pnl_from_orders(buy_order, sell_order))
+
+    assert risk.pnl == 0.0
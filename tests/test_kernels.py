@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from arbitrage_bot.arbitrage._kernels import (
+    _best_opportunity_loop, _best_opportunity_numpy, best_opportunity, merge_results,
+)
+
+
+def random_book(seed, n_symbols=700, n_exchanges=4):
+    """Quotes scattered around a per-symbol price, with some exchanges not quoting."""
+    rng = np.random.default_rng(seed)
+    mid = rng.uniform(1.0, 1000.0, size=(n_symbols, 1)) * (1 + rng.normal(0, 0.004, (n_symbols, n_exchanges)))
+    half_spread = rng.uniform(0.0, 0.001, size=(n_symbols, n_exchanges))
+    bids, asks = mid * (1 - half_spread), mid * (1 + half_spread)
+    missing = rng.random((n_symbols, n_exchanges)) < 0.2
+    bids[missing], asks[missing] = -np.inf, np.inf
+    fees = rng.choice([0.04, 0.075, 0.1], size=(n_symbols, n_exchanges))
+    return bids, asks, fees
+
+
+def assert_same_result(actual, expected):
+    assert actual[:3] == expected[:3]
+    assert actual[3:5] == pytest.approx(expected[3:5])
+    assert actual[5] == expected[5]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_kernels_agree_on_random_book(seed):
+    bids, asks, fees = random_book(seed)
+    rows = np.arange(bids.shape[0], dtype=np.intp)
+    expected = _best_opportunity_loop(bids, asks, fees, rows, 0.1)
+    assert expected[0] >= 0 and expected[5] > 1
+
+    assert_same_result(_best_opportunity_numpy(bids, asks, fees, rows, 0.1), expected)
+    assert_same_result(best_opportunity(bids, asks, fees, rows, 0.1), expected)
+
+
+def test_kernels_find_nothing_above_threshold():
+    bids, asks, fees = random_book(0)
+    rows = np.arange(bids.shape[0], dtype=np.intp)
+    assert _best_opportunity_numpy(bids, asks, fees, rows, 1e9) == (-1, -1, -1, 0.0, 0.0, 0)
+
+
+@pytest.mark.parametrize('shards', [2, 3, 8])
+def test_merged_shards_match_whole_scan(shards):
+    bids, asks, fees = random_book(7)
+    rows = np.flatnonzero(np.isfinite(asks).sum(axis=1) >= 2)
+    whole = _best_opportunity_numpy(bids, asks, fees, rows, 0.1)
+    merged = merge_results([_best_opportunity_numpy(bids, asks, fees, shard, 0.1)
+                            for shard in np.array_split(rows, shards)])
+    assert_same_result(merged, whole)
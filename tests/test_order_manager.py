@@ -0,0 +1,79 @@
+import asyncio
+import types
+
+from arbitrage_bot.execution.order_manager import OrderManager
+from arbitrage_bot.models.order import OrderStatus
+
+
+def ccxt_order(order_id, status='open', filled=0.0, amount=1.0):
+    return {
+        'id': order_id, 'symbol': 'BTC/USDT', 'side': 'buy', 'type': 'limit', 'status': status,
+        'amount': amount, 'filled': filled, 'price': 100.0, 'cost': filled * 100.0,
+        'timestamp': 1700000000000, 'fee': None,
+    }
+
+
+class FakeExchange:
+    """Returns the order states set in `orders` from fetch_order."""
+
+    def __init__(self):
+        self.orders = {}
+
+    async def fetch_order(self, order_id, symbol):
+        return self.orders[order_id]
+
+
+def make_order_manager(exchange):
+    exchange_manager = types.SimpleNamespace(get_exchange=lambda name: exchange)
+    return OrderManager(exchange_manager)
+
+
+def test_refresh_open_orders_tracks_fills_and_closes():
+    exchange = FakeExchange()
+    manager = make_order_manager(exchange)
+    manager.add_orders([('ex', ccxt_order('a')), ('ex', ccxt_order('b'))])
+    order_a = manager.get_order('a')
+    assert manager.get_open_order_count() == 2
+
+    # 'a' fills partially without leaving the open statuses, 'b' fills completely
+    exchange.orders = {'a': ccxt_order('a', filled=0.4), 'b': ccxt_order('b', 'closed', filled=1.0)}
+    asyncio.run(manager.refresh_open_orders())
+
+    assert manager.get_order('a') is order_a
+    assert order_a.status is OrderStatus.PARTIALLY_FILLED
+    assert order_a.filled == 0.4 and order_a.cost == 40.0
+    assert manager.get_order('b').status is OrderStatus.FILLED
+    assert manager.get_open_order_count() == 1
+
+    # Another fill of 'a' that keeps its status is still recorded
+    exchange.orders['a'] = ccxt_order('a', filled=0.7)
+    asyncio.run(manager.refresh_open_orders())
+    assert order_a.filled == 0.7
+
+
+def test_set_order_status_only_changes_the_status():
+    manager = make_order_manager(FakeExchange())
+    manager.add_orders([('ex', ccxt_order('a', filled=0.2))])
+    order = manager.get_order('a')
+
+    manager.set_order_status('a', 'canceled')
+
+    assert manager.get_order('a') is order
+    assert order.status is OrderStatus.CANCELED
+    assert order.filled == 0.2
+    assert manager.get_open_order_count() == 0
+
+
+def test_refresh_order_status_applies_the_exchange_state():
+    exchange = FakeExchange()
+    manager = make_order_manager(exchange)
+    manager.add_orders([('ex', ccxt_order('a'))])
+    order = manager.get_order('a')
+
+    exchange.orders = {'a': ccxt_order('a', 'canceled', filled=0.3)}
+    assert asyncio.run(manager.refresh_order_status('a')) is order
+    assert order.status is OrderStatus.CANCELED
+    assert order.filled == 0.3
+    assert manager.get_open_order_count() == 0
+
+    assert asyncio.run(manager.refresh_order_status('unknown')) is None
@@ -0,0 +1,69 @@
+import asyncio
+import types
+
+import numpy as np
+
+from arbitrage_bot.arbitrage import costs as costs_module
+from arbitrage_bot.arbitrage import scanner as scanner_module
+from arbitrage_bot.arbitrage.scanner import ArbitrageScanner
+from arbitrage_bot.config.settings import ArbitrageParams
+from arbitrage_bot.model import Quote
+
+
+class FakeConfig(types.SimpleNamespace):
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+class FakeDataFetcher:
+    """Serves fixed Level 1 quotes for every (exchange, symbol) stream."""
+
+    def __init__(self, quotes):
+        self.streams = list(quotes)
+        self.quotes = list(quotes.values())
+        self._quotes = quotes
+
+    def get_all_order_books(self):
+        return {exchange_name: {} for exchange_name, _ in self.streams}
+
+    def get_quote(self, exchange_name, symbol):
+        return self._quotes.get((exchange_name, symbol))
+
+
+def random_quotes(seed, n_symbols=600, exchanges=('a', 'b', 'c')):
+    rng = np.random.default_rng(seed)
+    quotes = {}
+    for i in range(n_symbols):
+        mid = rng.uniform(1.0, 1000.0)
+        for exchange_name in exchanges:
+            price = mid * (1 + rng.normal(0, 0.004))
+            quotes[(exchange_name, f"S{i}/USDT")] = Quote(price * 0.9999, price * 1.0001)
+    return quotes
+
+
+def make_scanner(monkeypatch, quotes, scan_workers):
+    config = FakeConfig(arbitrage_params=ArbitrageParams(min_profit_threshold=0.1, scan_workers=scan_workers))
+    monkeypatch.setattr(scanner_module, 'get_config', lambda: config)
+    monkeypatch.setattr(costs_module, 'get_config', lambda: config)
+    exchange_manager = types.SimpleNamespace(exchanges={}, get_exchange=lambda name: None)
+    return ArbitrageScanner(FakeDataFetcher(quotes), exchange_manager)
+
+
+def test_sharded_scan_matches_single_threaded_scan(monkeypatch):
+    quotes = random_quotes(3)
+    sharded = make_scanner(monkeypatch, quotes, scan_workers=2)
+    single = make_scanner(monkeypatch, quotes, scan_workers=1)
+    # Enough rows that scan_async splits them across the workers
+    assert len(quotes) // 3 >= 2 * scanner_module.BLOCK_ROWS
+
+    dirty = range(len(quotes))
+    try:
+        found = asyncio.run(sharded.scan_async(dirty))
+    finally:
+        sharded.close()
+    expected = single.scan(dirty)
+
+    assert expected is not None
+    assert (found.symbol, found.buy_exchange, found.sell_exchange) == (
+        expected.symbol, expected.buy_exchange, expected.sell_exchange)
+    assert found.net_profit_pct == expected.net_profit_pct